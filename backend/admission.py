@@ -0,0 +1,291 @@
+"""
+In-process admission control.
+
+Each worker caps how many requests per endpoint group may run at once.
+Excess requests wait in a bounded queue; when the queue is full (or the
+wait times out) the request is shed with 503 + Retry-After instead of
+piling more load onto the database. Autosave traffic is additionally
+rate limited per session with a token bucket (429 + Retry-After).
+
+A queued request still holds one of the worker's threads, so the queue is
+shared by all groups and sized together with the concurrency limits to
+stay below the thread count (WORKER_THREADS, gunicorn's --threads). That
+leaves threads for routes outside admission control, and a burst in one
+group can never tie up the threads another group's slots need.
+"""
+import math
+import threading
+import time
+
+from flask import request, session, g, jsonify
+
+# Endpoint (Flask view name) -> admission group
+ENDPOINT_GROUPS = {
+    'api_login': 'login',
+    'sync_phase2': 'sync',
+    'submit_quiz': 'submit',
+    'submit_bst': 'submit',
+    'submit_detective': 'submit',
+    'complete_rb': 'submit',
+    'submit_traversal': 'submit',
+    'exit_phase2': 'submit',
+    'complete_phase_2_alt': 'submit',
+    'complete_phase_3': 'submit',
+}
+
+# Endpoints that are token-bucket limited per session
+RATE_LIMITED_ENDPOINTS = {'sync_phase2'}
+
+# Idle token buckets are dropped after this many seconds
+BUCKET_IDLE_SECONDS = 600
+
+# Shed requests come back; the count of recent ones decays with this half-life
+SHED_HALF_LIFE_SECONDS = 10
+# Upper bound for Retry-After on a shed request
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+def default_limits(threads):
+    """
+    Concurrency per group and shared queue size that fit in `threads`.
+    A quarter of the threads (at least 2) stays free for unlimited routes
+    such as /api/status and page loads.
+    """
+    budget = max(3, threads - max(2, threads // 4))
+    max_queue = max(1, budget // 4)
+    concurrent = budget - max_queue
+    small = max(1, concurrent // 4)
+    return {'login': small, 'submit': small, 'sync': max(1, concurrent - 2 * small)}, max_queue
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Consume one token. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0
+        return False, (1 - self.tokens) / self.rate
+
+
+class WaitQueue:
+    """Bound on requests waiting for a slot, shared by all groups of a worker."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            if self.size >= self.max_size:
+                return False
+            self.size += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.size -= 1
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded wait queue and shedding counters."""
+
+    def __init__(self, name, max_concurrent, queue, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.avg_service_seconds = 0.1
+        # Decaying count of recently shed requests - clients that will retry
+        self.recent_shed = 0.0
+        self._shed_updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _decay_shed(self, now):
+        self.recent_shed *= 0.5 ** ((now - self._shed_updated) / SHED_HALF_LIFE_SECONDS)
+        self._shed_updated = now
+
+    def _shed(self):
+        # Called with self._cond held
+        self._decay_shed(time.monotonic())
+        self.recent_shed += 1
+
+    def retry_after(self):
+        """
+        Rough time until this group has served everyone ahead of a newly shed
+        request: the queue plus the shed clients that are coming back.
+        """
+        with self._cond:
+            self._decay_shed(time.monotonic())
+            backlog = self.waiting + self.recent_shed + 1
+        drain = backlog / self.max_concurrent * self.avg_service_seconds
+        return min(MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(drain)))
+
+    def acquire(self):
+        """Returns (admitted, reason)."""
+        with self._cond:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return True, None
+            # Shed at once rather than park another thread the worker doesn't have
+            if not self.queue.enter():
+                self.rejected_queue_full += 1
+                self._shed()
+                return False, 'queue_full'
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        self._shed()
+                        return False, 'timeout'
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+                self.queue.leave()
+            self.active += 1
+            self.admitted += 1
+            return True, None
+
+    def release(self, service_seconds):
+        with self._cond:
+            self.active -= 1
+            # EWMA of service time, used for Retry-After estimates
+            self.avg_service_seconds = 0.8 * self.avg_service_seconds + 0.2 * service_seconds
+            self._cond.notify()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "recent_shed": round(self.recent_shed * 0.5 ** ((time.monotonic() - self._shed_updated) / SHED_HALF_LIFE_SECONDS), 1),
+            "avg_service_ms": round(self.avg_service_seconds * 1000, 1),
+        }
+
+
+class AdmissionController:
+    def __init__(self, logger, max_concurrent, max_queue, queue_timeout, sync_rate, sync_burst):
+        self.logger = logger
+        self.queue = WaitQueue(max_queue)
+        self.limiters = {
+            group: ConcurrencyLimiter(group, max_concurrent[group], self.queue, queue_timeout)
+            for group in set(ENDPOINT_GROUPS.values())
+        }
+        self.sync_rate = sync_rate
+        self.sync_burst = sync_burst
+        self.rate_limited = 0
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._last_bucket_prune = time.monotonic()
+
+    def _take_token(self, endpoint, client_key):
+        with self._buckets_lock:
+            now = time.monotonic()
+            if now - self._last_bucket_prune > BUCKET_IDLE_SECONDS:
+                self._buckets = {
+                    k: b for k, b in self._buckets.items()
+                    if now - b.updated < BUCKET_IDLE_SECONDS
+                }
+                self._last_bucket_prune = now
+            bucket = self._buckets.get((endpoint, client_key))
+            if bucket is None:
+                bucket = TokenBucket(self.sync_rate, self.sync_burst)
+                self._buckets[(endpoint, client_key)] = bucket
+            allowed, wait = bucket.take()
+            if not allowed:
+                self.rate_limited += 1
+            return allowed, wait
+
+    def before_request(self):
+        endpoint = request.endpoint
+        group = ENDPOINT_GROUPS.get(endpoint)
+        if group is None:
+            return None
+
+        if endpoint in RATE_LIMITED_ENDPOINTS:
+            client_key = session.get('user_email') or request.remote_addr
+            allowed, wait = self._take_token(endpoint, client_key)
+            if not allowed:
+                retry_after = max(1, math.ceil(wait))
+                resp = jsonify({"success": False, "error": "Too many requests", "retry_after": retry_after})
+                resp.status_code = 429
+                resp.headers['Retry-After'] = str(retry_after)
+                return resp
+
+        limiter = self.limiters[group]
+        admitted, reason = limiter.acquire()
+        if not admitted:
+            retry_after = limiter.retry_after()
+            self.logger.warning(f"[ADMISSION] Shedding {endpoint} ({reason}), queue_depth={self.queue.size}")
+            resp = jsonify({"success": False, "error": "Server busy, please retry", "retry_after": retry_after})
+            resp.status_code = 503
+            resp.headers['Retry-After'] = str(retry_after)
+            return resp
+
+        g.admission_limiter = limiter
+        g.admission_started = time.monotonic()
+        return None
+
+    def teardown_request(self, exc=None):
+        limiter = g.pop('admission_limiter', None)
+        if limiter is not None:
+            limiter.release(time.monotonic() - g.pop('admission_started'))
+
+    def stats(self):
+        return {
+            "groups": {name: limiter.stats() for name, limiter in self.limiters.items()},
+            "queue": {"size": self.queue.size, "max_size": self.queue.max_size},
+            "rate_limited": self.rate_limited,
+            "tracked_sessions": len(self._buckets),
+        }
+
+
+def init_app(app):
+    threads = int(app.config.get('WORKER_THREADS', 16))
+    default_concurrent, default_queue = default_limits(threads)
+    max_concurrent = {
+        group: int(app.config.get(f'ADMISSION_{group.upper()}_CONCURRENCY') or default)
+        for group, default in default_concurrent.items()
+    }
+    max_queue = int(app.config.get('ADMISSION_MAX_QUEUE') or default_queue)
+    if sum(max_concurrent.values()) + max_queue >= threads:
+        app.logger.warning(
+            f"[ADMISSION] Concurrency {max_concurrent} plus queue {max_queue} uses all {threads} worker "
+            f"threads - requests outside admission control can be starved"
+        )
+    controller = AdmissionController(
+        app.logger,
+        max_concurrent,
+        max_queue=max_queue,
+        queue_timeout=float(app.config.get('ADMISSION_QUEUE_TIMEOUT', 10)),
+        sync_rate=float(app.config.get('SYNC_RATE_PER_SECOND', 1)),
+        sync_burst=float(app.config.get('SYNC_BURST', 5)),
+    )
+    app.before_request(controller.before_request)
+    app.teardown_request(controller.teardown_request)
+    app.extensions['admission'] = controller
+    return controller
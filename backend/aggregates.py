@@ -0,0 +1,225 @@
+"""
+Running score statistics for organizers.
+
+Each worker keeps a compact snapshot per participant and a set of counters
+(registered -> logged in -> phase 1 -> 2 -> 3 funnel, per-phase sums, total-score histogram, per-challenge success).
+Every write replaces the participant's snapshot: its old contribution is
+subtracted and the new one added, so reads never scan `participants`.
+The counters are rebuilt from the DB at startup; changes made by other
+workers arrive through the participant change notifications.
+"""
+import os
+import threading
+from collections import namedtuple
+
+CHALLENGES = ('bst', 'rb', 'detective', 'traversal')
+PHASES = ('phase1', 'phase2', 'phase3')
+
+# Highest possible total: 50 (quiz) + 100 (DSA) + 100 (coding round)
+MAX_TOTAL = 250
+
+Snapshot = namedtuple('Snapshot', [
+    'logged_in',
+    'phase1_score', 'phase2_score', 'phase3_score', 'phase2_completed',
+    'bst_score', 'rb_score', 'detective_score', 'traversal_score',
+])
+
+EMPTY = Snapshot(False, None, None, None, False, None, None, None, None)
+
+REBUILD_SQL = """
+SELECT email,
+       updated_at IS NOT NULL AS logged_in,
+       phase1_score, phase2_score, phase3_score,
+       COALESCE(phase2_completed, false) AS phase2_completed,
+       (phase2_state->>'bst_score')::int AS bst_score,
+       (phase2_state->>'rb_score')::int AS rb_score,
+       (phase2_state->>'detective_score')::int AS detective_score,
+       (phase2_state->>'traversal_score')::int AS traversal_score
+FROM participants
+"""
+
+
+def challenge_scores(phase2_state):
+    """Challenge scores present in a phase2_state dict."""
+    return {
+        f"{name}_score": phase2_state[f"{name}_score"]
+        for name in CHALLENGES
+        if phase2_state.get(f"{name}_score") is not None
+    }
+
+
+class ScoreAggregates:
+    def __init__(self, bucket_width=10):
+        self.bucket_width = bucket_width
+        self.ready = False
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._pending = []
+        self._rebuild_lock = threading.Lock()
+        self._started_pid = None
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.participants = 0
+        self.funnel = {"logged_in": 0, "phase1": 0, "phase2": 0, "phase3": 0}
+        self.phase_sums = {phase: 0 for phase in PHASES}
+        self.phase_counts = {phase: 0 for phase in PHASES}
+        self.histogram = [0] * (MAX_TOTAL // self.bucket_width + 1)
+        self.challenge_attempts = {name: 0 for name in CHALLENGES}
+        self.challenge_successes = {name: 0 for name in CHALLENGES}
+
+    def _contribute(self, snap, sign):
+        self.participants += sign
+        if snap.logged_in:
+            self.funnel["logged_in"] += sign
+        if snap.phase1_score is not None:
+            self.funnel["phase1"] += sign
+        if snap.phase2_completed or snap.phase2_score is not None:
+            self.funnel["phase2"] += sign
+        if snap.phase3_score is not None:
+            self.funnel["phase3"] += sign
+
+        scores = (snap.phase1_score, snap.phase2_score, snap.phase3_score)
+        for phase, score in zip(PHASES, scores):
+            if score is not None:
+                self.phase_sums[phase] += sign * score
+                self.phase_counts[phase] += sign
+
+        if any(score is not None for score in scores):
+            total = sum(score or 0 for score in scores)
+            bucket = min(max(total, 0), MAX_TOTAL) // self.bucket_width
+            self.histogram[bucket] += sign
+
+        for name in CHALLENGES:
+            score = getattr(snap, f"{name}_score")
+            if score is not None:
+                self.challenge_attempts[name] += sign
+                if score > 0:
+                    self.challenge_successes[name] += sign
+
+    def _apply(self, email, fields):
+        old = self._snapshots.get(email)
+        new = (old or EMPTY)._replace(**fields)
+        if new == old:
+            return
+        if old is not None:
+            self._contribute(old, -1)
+        self._contribute(new, 1)
+        self._snapshots[email] = new
+
+    @staticmethod
+    def _snapshot_fields(fields):
+        """Map a participant update (as written to the DB) onto snapshot fields."""
+        result = {k: v for k, v in fields.items() if k in Snapshot._fields}
+        if isinstance(fields.get('phase2_state'), dict):
+            result.update(challenge_scores(fields['phase2_state']))
+        return result
+
+    def record(self, email, fields):
+        """Apply a participant write (DB column names, phase2_state as a dict)."""
+        snapshot_fields = self._snapshot_fields(fields)
+        if not snapshot_fields:
+            return
+        with self._lock:
+            if self._rebuilding:
+                self._pending.append((email, snapshot_fields))
+            self._apply(email, snapshot_fields)
+
+    def changed_challenges(self, email, fields):
+        """Challenge scores in `fields` that differ from what this worker knows."""
+        if not isinstance(fields.get('phase2_state'), dict):
+            return {}
+        scores = challenge_scores(fields['phase2_state'])
+        current = self._snapshots.get(email, EMPTY)
+        return {k: v for k, v in scores.items() if getattr(current, k) != v}
+
+    def rebuild(self, get_db):
+        """
+        Recompute every counter from a full scan of `participants`.
+        Returns False if a rebuild is already running.
+        """
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                self._rebuilding = True
+                self._pending = []
+            try:
+                snapshots = self._scan(get_db)
+            except Exception:
+                with self._lock:
+                    self._rebuilding = False
+                    self._pending = []
+                raise
+
+            with self._lock:
+                self._rebuilding = False
+                self._snapshots = snapshots
+                self._reset_counters()
+                for snap in snapshots.values():
+                    self._contribute(snap, 1)
+                # Writes that raced with the scan set absolute values, so replaying them is safe
+                for email, fields in self._pending:
+                    self._apply(email, fields)
+                self._pending = []
+                self.ready = True
+            return True
+        finally:
+            self._rebuild_lock.release()
+
+    def start_rebuild(self, get_db, logger):
+        """Rebuild in a background thread (once per worker process at startup)."""
+        if self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+
+        def run():
+            try:
+                self.rebuild(get_db)
+                logger.info(f"[STATS] Aggregates rebuilt for {self.participants} participants")
+            except Exception as e:
+                logger.error(f"[STATS] Aggregate rebuild failed: {str(e)}")
+
+        threading.Thread(target=run, name='aggregates-rebuild', daemon=True).start()
+
+    @staticmethod
+    def _scan(get_db):
+        snapshots = {}
+        with get_db() as conn:
+            # Named (server-side) cursor streams the table instead of loading it at once
+            with conn.cursor(name='aggregates_rebuild') as cur:
+                cur.itersize = 5000
+                cur.execute(REBUILD_SQL)
+                for row in cur:
+                    snapshots[row[0]] = Snapshot(
+                        bool(row[1]), row[2], row[3], row[4], bool(row[5]), row[6], row[7], row[8], row[9]
+                    )
+        return snapshots
+
+    def stats(self):
+        with self._lock:
+            averages = {
+                phase: round(self.phase_sums[phase] / self.phase_counts[phase], 2) if self.phase_counts[phase] else None
+                for phase in PHASES
+            }
+            return {
+                "ready": self.ready,
+                "participants": self.participants,
+                "funnel": {"registered": self.participants, **self.funnel},
+                "phase_averages": averages,
+                "phase_submissions": dict(self.phase_counts),
+                "total_score_histogram": [
+                    {"from": i * self.bucket_width, "to": i * self.bucket_width + self.bucket_width - 1, "count": count}
+                    for i, count in enumerate(self.histogram)
+                ],
+                "challenges": {
+                    name: {
+                        "attempted": self.challenge_attempts[name],
+                        "succeeded": self.challenge_successes[name],
+                        "success_rate": round(self.challenge_successes[name] / self.challenge_attempts[name], 3)
+                        if self.challenge_attempts[name] else None,
+                    }
+                    for name in CHALLENGES
+                },
+            }
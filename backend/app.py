@@ -1,10 +1,26 @@
-from flask import Flask, jsonify, request, session, render_template, send_from_directory, Response, redirect
+from flask import Flask, jsonify, request, session, render_template, send_from_directory, Response, redirect, has_request_context
 from flask_cors import CORS
-from quiz_data import QUIZ_QUESTIONS
+from quiz_bank import QuizBankStore, QuizBankError
+from idempotency import idempotent
+import idempotency
+import admission
+from db_journal import CircuitBreaker, CircuitOpenError, WriteJournal, JournalReplayer
+from participant_cache import ParticipantCache, NotificationListener, notify_change, CACHED_COLUMNS
+from read_replica import ReadReplica
+from aggregates import ScoreAggregates, challenge_scores
+from roster_import import import_roster, RosterError
+from warmup import WarmUp
+import json_provider
+import compression
+import traffic_capture
+import profiling
 import os
 import io
 import csv
 import json
+import hmac
+import threading
+import time
 import psycopg2
 import psycopg2.extras
 from datetime import datetime, timedelta
@@ -18,22 +34,156 @@ STATIC_DIR = os.path.join(PARENT_DIR, 'static')
 app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
 app.secret_key = os.environ.get('SECRET_KEY', 'AVENGERS_ASSEMBLE_SECRET_KEY')
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2) # Keep session alive
+app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 7200))
+app.config['IDEMPOTENCY_CACHE_SIZE'] = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+# Must match gunicorn's --threads; admission limits default to a share of it
+app.config['WORKER_THREADS'] = int(os.environ.get('WORKER_THREADS', 16))
+app.config['ADMISSION_LOGIN_CONCURRENCY'] = os.environ.get('ADMISSION_LOGIN_CONCURRENCY')
+app.config['ADMISSION_SYNC_CONCURRENCY'] = os.environ.get('ADMISSION_SYNC_CONCURRENCY')
+app.config['ADMISSION_SUBMIT_CONCURRENCY'] = os.environ.get('ADMISSION_SUBMIT_CONCURRENCY')
+app.config['ADMISSION_MAX_QUEUE'] = os.environ.get('ADMISSION_MAX_QUEUE')
+app.config['ADMISSION_QUEUE_TIMEOUT'] = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 10))
+app.config['SYNC_RATE_PER_SECOND'] = float(os.environ.get('SYNC_RATE_PER_SECOND', 1))
+app.config['SYNC_BURST'] = float(os.environ.get('SYNC_BURST', 5))
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))
+app.config['TRAFFIC_CAPTURE_DIR'] = os.environ.get('TRAFFIC_CAPTURE_DIR')
+app.config['TRAFFIC_CAPTURE_MAX_BYTES'] = int(os.environ.get('TRAFFIC_CAPTURE_MAX_BYTES', 50 * 1024 * 1024))
+app.config['TRAFFIC_CAPTURE_BACKUPS'] = int(os.environ.get('TRAFFIC_CAPTURE_BACKUPS', 5))
+app.config['TRAFFIC_CAPTURE_SAMPLE'] = float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE', 1.0))
+app.config['PROFILE_MEMORY'] = os.environ.get('PROFILE_MEMORY', '').lower() in ('1', 'true')
+app.config['PROFILE_CPU'] = os.environ.get('PROFILE_CPU', '').lower() in ('1', 'true')
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.01))
+app.config['PROFILE_TRACE_FRAMES'] = int(os.environ.get('PROFILE_TRACE_FRAMES', 16))
+app.config['PROFILE_CPU_INTERVAL'] = float(os.environ.get('PROFILE_CPU_INTERVAL', 0.005))
+app.config['PROFILE_DUMP_DIR'] = os.environ.get('PROFILE_DUMP_DIR')
 CORS(app)
 
+# orjson-backed JSON (stdlib fallback) + gzip for larger API responses
+json_provider.init_app(app)
+compression.init_app(app)
+
+# Opt-in anonymized request traces for replay_traffic.py. Registered before
+# admission control so shed requests (429/503) are captured too.
+traffic_capture.init_app(app)
+
+# Allocation / CPU profiling, off unless switched on (env or /api/admin/profile)
+profiling.init_app(app)
+
 # Neon PostgreSQL Configuration
 DATABASE_URL = os.environ.get('DATABASE_URL')
 
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+
+# Fail fast while Neon is unreachable instead of waiting out a connect timeout per request
+db_breaker = CircuitBreaker(
+    failure_threshold=int(os.environ.get('DB_BREAKER_FAILURES', 3)),
+    reset_timeout=float(os.environ.get('DB_BREAKER_RESET_SECONDS', 15))
+)
+
+# Local journal for participant updates made while the breaker is open
+write_journal = WriteJournal(os.environ.get('WRITE_JOURNAL_PATH', os.path.join(BASE_DIR, 'write_journal.sqlite3')))
+
 def get_db():
     """Get a new DB connection for each request."""
     if not DATABASE_URL:
         raise Exception("DATABASE_URL not configured")
-    return psycopg2.connect(DATABASE_URL)
+    if not db_breaker.allow():
+        raise CircuitOpenError("Database circuit open")
+    try:
+        conn = psycopg2.connect(DATABASE_URL, connect_timeout=DB_CONNECT_TIMEOUT)
+    except psycopg2.OperationalError:
+        db_breaker.record_failure()
+        raise
+    db_breaker.record_success()
+    return conn
+
+# Optional read replica for read-only queries (status, scores, phase 2 restore)
+DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL')
+read_replica = None
+if DATABASE_READ_URL:
+    read_replica = ReadReplica(
+        DATABASE_READ_URL,
+        max_connections=int(os.environ.get('READ_POOL_SIZE', 10)),
+        connect_timeout=DB_CONNECT_TIMEOUT,
+        logger=app.logger
+    )
+    app.logger.info("[DB] Read replica configured")
+
+def remember_commit_lsn(conn):
+    """
+    Store the primary's WAL position after a commit in the session, so this
+    participant's later replica reads can wait for (or skip) a lagging replica.
+    """
+    if read_replica is None or not has_request_context():
+        return
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_current_wal_lsn()::text")
+            session['db_lsn'] = cur.fetchone()[0]
+    except Exception as e:
+        # Unknown position: pin this session's reads to the primary until the next write
+        session['db_lsn'] = 'FFFFFFFF/FFFFFFFF'
+        app.logger.warning(f"[DB READ] Could not record commit LSN: {str(e)}")
+
+def is_db_unreachable(e):
+    return isinstance(e, (CircuitOpenError, psycopg2.OperationalError))
+
+# Per-worker cache of score rows, kept coherent across workers via LISTEN/NOTIFY
+participant_cache = ParticipantCache(int(os.environ.get('PARTICIPANT_CACHE_SIZE', 20000)))
+
+def connect_listener():
+    """Dedicated connection for LISTEN - not subject to the circuit breaker."""
+    return psycopg2.connect(DATABASE_URL, connect_timeout=DB_CONNECT_TIMEOUT)
+
+change_listener = NotificationListener(connect_listener, participant_cache, app.logger)
+
+# Running organizer statistics, updated on every write (ours and other workers')
+score_aggregates = ScoreAggregates()
+
+def apply_remote_change(payload):
+    score_aggregates.record(payload['email'], {**payload.get('fields', {}), **(payload.get('extra') or {})})
+
+change_listener.add_handler(apply_remote_change)
+
+def rebuild_aggregates_after_reconnect():
+    # Changes made while the listener was down never reached these counters
+    def run():
+        try:
+            if score_aggregates.rebuild(get_db):
+                app.logger.info(f"[STATS] Aggregates rebuilt after listener reconnect ({score_aggregates.participants} participants)")
+        except Exception as e:
+            app.logger.error(f"[STATS] Aggregate rebuild after reconnect failed: {str(e)}")
+
+    threading.Thread(target=run, name='aggregates-rebuild', daemon=True).start()
+
+change_listener.add_reconnect_hook(rebuild_aggregates_after_reconnect)
 
 if DATABASE_URL:
     app.logger.info("[DB] Neon PostgreSQL configured successfully")
 else:
     app.logger.warning("[DB] DATABASE_URL not set — database will not work")
 
+# Deduplicate retried submissions (Idempotency-Key header)
+idempotency.init_app(app, get_db)
+
+# Per-endpoint concurrency limits + per-session autosave rate limiting
+admission.init_app(app)
+
+# Phase 1 question bank, hot-reloaded when the file changes
+quiz_bank = QuizBankStore(
+    os.environ.get('QUIZ_BANK_PATH', os.path.join(BASE_DIR, 'quiz_bank.json')),
+    app.logger,
+    poll_seconds=float(os.environ.get('QUIZ_BANK_POLL_SECONDS', 5))
+)
+
+# Admin endpoints require the X-Admin-Key header to match ADMIN_KEY
+ADMIN_KEY = os.environ.get('ADMIN_KEY')
+
+def is_admin_request():
+    supplied = request.headers.get('X-Admin-Key', '')
+    return bool(ADMIN_KEY) and hmac.compare_digest(supplied, ADMIN_KEY)
+
 # Routes
 @app.route('/')
 def index():
@@ -78,8 +228,20 @@ def static_files(filename):
 def get_utc_now_iso():
     return datetime.utcnow().isoformat()
 
-def db_fetch_one(query, params):
-    """Helper: fetch a single row as a dict."""
+def db_fetch_one(query, params, readonly=False):
+    """
+    Helper: fetch a single row as a dict.
+    readonly=True lets the read replica serve it if it has caught up with
+    this session's last write; otherwise the primary is used.
+    """
+    if readonly and read_replica is not None:
+        try:
+            served, row = read_replica.fetch_one(query, params, session.get('db_lsn') if has_request_context() else None)
+            if served:
+                return row
+        except Exception as e:
+            app.logger.warning(f"[DB READ] Replica read failed, using primary: {str(e)}")
+
     with get_db() as conn:
         with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
             cur.execute(query, params)
@@ -89,7 +251,8 @@ def db_fetch_one(query, params):
 def db_upsert_participant(email, name):
     """
     UPSERT for login only - Always sets email + name, never null name.
-    Preserves existing name if participant exists, only updates if new.
+    Preserves existing name if participant exists (including rows created by
+    the roster import), only updates if new.
     Initializes scores as NULL for new participants only.
     Returns (success: bool, error: str or None)
     """
@@ -101,28 +264,34 @@ def db_upsert_participant(email, name):
 
         with get_db() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                # Check if participant exists
-                cur.execute("SELECT email, name FROM participants WHERE email = %s", (email,))
-                existing = cur.fetchone()
-                existing_name = existing['name'] if existing else None
-
-                # Preserve name if already set
-                final_name = (existing_name.strip() if existing_name and existing_name.strip() else name.strip())
+                # Single round trip: insert, or keep the existing (e.g. pre-registered) name.
+                # `prev` is read before the upsert, so first_login is true for new rows and
+                # for roster rows that have never logged in (updated_at IS NULL).
+                cur.execute(
+                    """WITH prev AS (SELECT updated_at FROM participants WHERE email = %s)
+                       INSERT INTO participants (email, name, phase1_score, phase2_score, phase3_score, total_score, updated_at)
+                       VALUES (%s, %s, NULL, NULL, NULL, NULL, NOW())
+                       ON CONFLICT (email) DO UPDATE
+                           SET name = COALESCE(NULLIF(TRIM(participants.name), ''), EXCLUDED.name),
+                               updated_at = NOW()
+                       RETURNING name, (xmax = 0) AS inserted, (SELECT updated_at FROM prev) IS NULL AS first_login""",
+                    (email, email, name.strip())
+                )
+                result = cur.fetchone()
+                final_name = result['name']
+                first_login = result['first_login']
 
-                if existing:
-                    app.logger.info(f"[DB WRITE] Preserving existing name for email={email}: {final_name}")
-                    cur.execute(
-                        "UPDATE participants SET name=%s, updated_at=NOW() WHERE email=%s",
-                        (final_name, email)
-                    )
+                if result['inserted']:
+                    app.logger.info(f"[DB WRITE] Inserted new participant email={email}, name={final_name}")
                 else:
-                    app.logger.info(f"[DB WRITE] Inserting new participant email={email}, name={final_name}")
-                    cur.execute(
-                        """INSERT INTO participants (email, name, phase1_score, phase2_score, phase3_score, total_score, updated_at)
-                           VALUES (%s, %s, NULL, NULL, NULL, NULL, NOW())""",
-                        (email, final_name)
-                    )
+                    app.logger.info(f"[DB WRITE] Preserving existing name for email={email}: {final_name}")
+                if first_login:
+                    notify_change(cur, email, extra={"logged_in": True})
                 conn.commit()
+                remember_commit_lsn(conn)
+
+        if first_login:
+            score_aggregates.record(email, {"logged_in": True})
 
         app.logger.info(f"[DB SUCCESS] Upsert successful for email={email}")
         return True, None
@@ -132,11 +301,24 @@ def db_upsert_participant(email, name):
         app.logger.error(f"[DB ERROR] {error_msg}")
         return False, error_msg
 
-def db_update_participant(email, data):
+# Recomputed inside the writing transaction, never from a (possibly stale) cached row
+RECOMPUTE_TOTAL_SQL = """UPDATE participants
+   SET total_score = COALESCE(phase1_score, 0) + COALESCE(phase2_score, 0) + COALESCE(phase3_score, 0)
+   WHERE email = %s
+   RETURNING total_score"""
+
+def db_update_participant(email, data, recompute_total=False):
     """
     UPDATE for phase submissions - NEVER use upsert after login.
+    With recompute_total, total_score is set from the stored phase scores
+    in the same transaction.
+    If the DB is unreachable the update is journaled locally and acknowledged.
     Returns (success: bool, error: str or None)
     """
+    # Once anything is journaled, later writes queue behind it to keep order
+    if db_breaker.is_open() or write_journal.has_pending():
+        return journal_participant_update(email, data, recompute_total)
+
     try:
         payload = data.copy()
         payload["updated_at"] = datetime.utcnow()
@@ -147,6 +329,9 @@ def db_update_participant(email, data):
 
         app.logger.info(f"[DB WRITE] Attempting update for email={email}, fields={list(payload.keys())}")
 
+        # Other workers' aggregates only need to hear about challenge scores that changed
+        changed_challenges = score_aggregates.changed_challenges(email, data)
+
         with get_db() as conn:
             with conn.cursor() as cur:
                 cur.execute(
@@ -156,16 +341,113 @@ def db_update_participant(email, data):
                 if cur.rowcount == 0:
                     app.logger.error(f"[DB ERROR] No rows updated for email={email}")
                     return False, "No rows updated"
+                if recompute_total:
+                    cur.execute(RECOMPUTE_TOTAL_SQL, (email,))
+                    data = {**data, "total_score": cur.fetchone()[0]}
+                # Delivered to other workers only if this transaction commits
+                notify_change(cur, email, data, extra=changed_challenges)
                 conn.commit()
+            remember_commit_lsn(conn)
 
+        participant_cache.apply(email, data)
+        score_aggregates.record(email, data)
         app.logger.info(f"[DB SUCCESS] Update successful for email={email}")
         return True, None
 
     except Exception as e:
+        if is_db_unreachable(e):
+            return journal_participant_update(email, data, recompute_total)
         error_msg = f"DB Update Failed: {str(e)}"
         app.logger.error(f"[DB ERROR] {error_msg}")
         return False, error_msg
 
+def journal_participant_update(email, data, recompute_total=False):
+    """Append an update to the local write journal. Returns (success, error)."""
+    if recompute_total:
+        # Replay recomputes total_score once the other phase scores can be read
+        data = {**data, "total_score": None}
+    try:
+        write_journal.append(email, data, datetime.utcnow())
+    except Exception as e:
+        error_msg = f"DB unavailable and journal write failed: {str(e)}"
+        app.logger.error(f"[DB JOURNAL] {error_msg}")
+        return False, error_msg
+
+    # Totals computed during the outage are provisional - read them from the session until replay
+    participant_cache.evict(email)
+    score_aggregates.record(email, data)
+    app.logger.warning(f"[DB JOURNAL] Database unavailable, journaled update for email={email}, fields={list(data.keys())}")
+    return True, None
+
+def db_replay_update(email, fields, journaled_at):
+    """
+    Apply one journaled update. total_score is recomputed from the stored
+    phase scores since the original request could not read them.
+    """
+    payload = {k: v for k, v in fields.items() if k != 'total_score'}
+    payload["updated_at"] = datetime.fromisoformat(journaled_at)
+
+    set_clause = ", ".join(f"{k} = %s" for k in payload.keys())
+    values = list(payload.values()) + [email]
+
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"UPDATE participants SET {set_clause} WHERE email = %s",
+                values
+            )
+            if cur.rowcount == 0:
+                raise Exception("No rows updated")
+            if 'total_score' in fields:
+                cur.execute(RECOMPUTE_TOTAL_SQL, (email,))
+            # Other workers never saw the journaled write - send the fields along with the invalidation
+            extra = challenge_scores(fields['phase2_state']) if isinstance(fields.get('phase2_state'), dict) else None
+            notify_change(cur, email, payload, invalidate=True, extra=extra)
+            conn.commit()
+
+    participant_cache.evict(email)
+    score_aggregates.record(email, fields)
+    app.logger.info(f"[DB JOURNAL] Replayed update for email={email}, fields={list(fields.keys())}")
+
+journal_replayer = JournalReplayer(write_journal, db_replay_update, is_db_unreachable, app.logger)
+
+@app.before_request
+def start_background_threads():
+    # Started lazily so each forked worker gets its own threads
+    journal_replayer.ensure_started()
+    quiz_bank.ensure_started()
+    warm_up.ensure_started()
+    if DATABASE_URL:
+        change_listener.ensure_started()
+        score_aggregates.start_rebuild(get_db, app.logger)
+
+def get_participant_scores(email):
+    """
+    Score columns + phase2_completed for a participant. Served from the
+    worker cache when the change listener is connected, else from the DB.
+    """
+    row = participant_cache.get(email)
+    if row is not None:
+        return row
+    epoch = participant_cache.epoch()
+    # Rows that will be cached must come from the primary: a lagging replica could
+    # predate a notification this worker already applied and pin a stale row
+    row = db_fetch_one(
+        f"SELECT {', '.join(CACHED_COLUMNS)} FROM participants WHERE email = %s",
+        (email,),
+        readonly=not participant_cache.enabled
+    )
+    if row is not None:
+        participant_cache.fill(email, row, epoch)
+    return row
+
+def derive_phase_flags(row):
+    """Phase completion derived from DB only (IS NOT NULL means completed)."""
+    phase1_completed = row.get('phase1_score') is not None
+    phase2_completed = bool(row.get('phase2_completed')) or (row.get('phase2_score') is not None)
+    phase3_completed = row.get('phase3_score') is not None
+    return phase1_completed, phase2_completed, phase3_completed
+
 # Timer logic removed - Phase 2 has unlimited time
 
 # --- AUTH & PHASE 1 ---
@@ -213,9 +495,7 @@ def api_login():
             session['phase3_score'] = row.get('phase3_score') or 0
 
             # Derive phase completion from DB only (IS NOT NULL means completed)
-            phase1_completed = row.get('phase1_score') is not None
-            phase2_completed = row.get('phase2_completed', False) or (row.get('phase2_score') is not None)
-            phase3_completed = row.get('phase3_score') is not None
+            phase1_completed, phase2_completed, phase3_completed = derive_phase_flags(row)
 
             session['phase1_completed'] = phase1_completed
             session['phase2_completed'] = phase2_completed
@@ -238,22 +518,25 @@ def api_login():
         "phase3_completed": phase3_completed
     })
 
-@app.route('/api/quiz', methods=['GET'])
-def get_quiz():
+def build_quiz_payload():
+    """Randomized question list without answers."""
     import random
     # Randomly select ONLY 5 questions from pool of 10
-    selected = random.sample(QUIZ_QUESTIONS, min(10, len(QUIZ_QUESTIONS)))
-    app.logger.info(f"[PHASE1] Total questions in pool: {len(QUIZ_QUESTIONS)}, Returning {len(selected)} questions (randomized)")
-    
-    result = [
-        {"id": q["id"], "question": q["question"], "options": q["options"]} 
-        for q in selected
-    ]
+    bank = quiz_bank.current
+    result = random.sample(bank.public, min(10, len(bank)))
+    app.logger.info(f"[PHASE1] Total questions in pool: {len(bank)}, Returning {len(result)} questions (randomized)")
+    # Grade against the version these questions came from, even if the bank is swapped meanwhile
+    session['quiz_version'] = bank.version
     
     app.logger.info(f"[PHASE1] Returning question IDs: {[q['id'] for q in result]}")
-    return jsonify(result)
+    return result
+
+@app.route('/api/quiz', methods=['GET'])
+def get_quiz():
+    return jsonify(build_quiz_payload())
 
 @app.route('/api/submit-quiz', methods=['POST'])
+@idempotent
 def submit_quiz():
     email = session.get('user_email')
     if not email:
@@ -262,34 +545,19 @@ def submit_quiz():
     
     data = request.json
     answers = data.get('answers', {})
-    score = 0
     
     # Each question = 5 marks, max 10 questions = 50 marks total
-    for q in QUIZ_QUESTIONS:
-        if answers.get(str(q['id'])) == q['answer']:
-            score += 5
+    score = quiz_bank.get(session.get('quiz_version')).correct_count(answers) * 5
     
     app.logger.info(f"[PHASE1] Submission for email={email}, score={score} out of 50")
     
     session['phase1_score'] = score
     session['phase1_completed'] = True
     
-    # COMPLETE PHASE 1 - Use UPDATE (never upsert after login)
-    # Fetch current scores from DB to calculate total
-    try:
-        row = db_fetch_one("SELECT phase2_score, phase3_score FROM participants WHERE email = %s", (email,))
-        phase2_score = (row.get('phase2_score') or 0) if row else 0
-        phase3_score = (row.get('phase3_score') or 0) if row else 0
-    except Exception as e:
-        app.logger.warning(f"[PHASE1] Could not fetch existing scores: {str(e)}")
-        phase2_score = 0
-        phase3_score = 0
-    
-    total = score + phase2_score + phase3_score
+    # COMPLETE PHASE 1 - Use UPDATE (never upsert after login); total_score is summed in SQL
     success, error = db_update_participant(email, {
-        "phase1_score": score,
-        "total_score": total
-    })
+        "phase1_score": score
+    }, recompute_total=True)
     
     if not success:
         app.logger.error(f"[PHASE1] DB write failed for email={email}: {error}")
@@ -322,7 +590,7 @@ def sync_phase2():
     
     # Fetch from DB first to restore state
     try:
-        row = db_fetch_one("SELECT phase2_state, phase2_completed FROM participants WHERE email = %s", (email,))
+        row = db_fetch_one("SELECT phase2_state, phase2_completed FROM participants WHERE email = %s", (email,), readonly=True)
         if row:
             db_state = row.get('phase2_state') or {}
             db_completed = row.get('phase2_completed', False)
@@ -633,6 +901,7 @@ def submit_traversal():
     return jsonify({"success": True, "valid": valid, "message": msg, "score": points})
 
 @app.route('/api/phase2/exit', methods=['POST'])
+@idempotent
 def exit_phase2():
     email = session.get('user_email')
     if not email:
@@ -649,25 +918,12 @@ def exit_phase2():
     
     app.logger.info(f"[PHASE2] Exit for email={email}, score={p2_score}")
     
-    # Fetch current scores from DB to calculate total
-    try:
-        row = db_fetch_one("SELECT phase1_score, phase3_score FROM participants WHERE email = %s", (email,))
-        phase1_score = (row.get('phase1_score') or 0) if row else 0
-        phase3_score = (row.get('phase3_score') or 0) if row else 0
-    except Exception as e:
-        app.logger.warning(f"[PHASE2] Could not fetch existing scores: {str(e)}")
-        phase1_score = 0
-        phase3_score = 0
-    
-    total = phase1_score + p2_score + phase3_score
-    
-    # Use UPDATE - set phase2_score and phase2_completed = true
+    # Use UPDATE - set phase2_score and phase2_completed = true; total_score is summed in SQL
     # No timer fields - removed phase2_time_left
     success, error = db_update_participant(email, {
         "phase2_score": p2_score,
-        "phase2_completed": True,
-        "total_score": total
-    })
+        "phase2_completed": True
+    }, recompute_total=True)
     
     if not success:
         app.logger.error(f"[PHASE2] DB write failed for email={email}: {error}")
@@ -690,6 +946,7 @@ def complete_phase_2_alt():
 # --- PHASE 3 ---
 
 @app.route('/api/complete-phase-3', methods=['POST'])
+@idempotent
 def complete_phase_3():
     email = session.get('user_email')
     if not email:
@@ -704,23 +961,10 @@ def complete_phase_3():
     session['phase3_score'] = points
     session['phase3_completed'] = True
     
-    # Fetch current scores from DB to calculate total
-    try:
-        row = db_fetch_one("SELECT phase1_score, phase2_score FROM participants WHERE email = %s", (email,))
-        phase1_score = (row.get('phase1_score') or 0) if row else 0
-        phase2_score = (row.get('phase2_score') or 0) if row else 0
-    except Exception as e:
-        app.logger.warning(f"[PHASE3] Could not fetch existing scores: {str(e)}")
-        phase1_score = 0
-        phase2_score = 0
-    
-    total = phase1_score + phase2_score + points
-    
-    # COMPLETE PHASE 3 - Use UPDATE (never upsert after login)
+    # COMPLETE PHASE 3 - Use UPDATE (never upsert after login); total_score is summed in SQL
     success, error = db_update_participant(email, {
-        "phase3_score": points,
-        "total_score": total
-    })
+        "phase3_score": points
+    }, recompute_total=True)
     
     if not success:
         app.logger.error(f"[PHASE3] DB write failed for email={email}: {error}")
@@ -762,18 +1006,13 @@ def get_status():
     phase3_score = 0
 
     try:
-        row = db_fetch_one(
-            "SELECT phase1_score, phase2_score, phase3_score, phase2_completed FROM participants WHERE email = %s",
-            (email,)
-        )
+        row = get_participant_scores(email)
         if row:
             phase1_score = row.get('phase1_score') or 0
             phase2_score = row.get('phase2_score') or 0
             phase3_score = row.get('phase3_score') or 0
 
-            phase1_completed = row.get('phase1_score') is not None
-            phase2_completed = row.get('phase2_completed', False) or (row.get('phase2_score') is not None)
-            phase3_completed = row.get('phase3_score') is not None
+            phase1_completed, phase2_completed, phase3_completed = derive_phase_flags(row)
 
             session['phase1_completed'] = phase1_completed
             session['phase2_completed'] = phase2_completed
@@ -818,10 +1057,7 @@ def get_total_score():
     scores_visible = False
 
     try:
-        row = db_fetch_one(
-            "SELECT phase1_score, phase2_score, phase3_score, total_score FROM participants WHERE email = %s",
-            (email,)
-        )
+        row = get_participant_scores(email)
         if row:
             phase1_score = row.get('phase1_score') or 0
             phase2_score = row.get('phase2_score') or 0
@@ -853,5 +1089,282 @@ def get_total_score():
         "scores_visible": scores_visible
     })
 
+@app.route('/api/bootstrap', methods=['GET'])
+def bootstrap():
+    """
+    Everything a page needs on load in one round trip, from one row fetch:
+    completion flags, scores (visible only after Phase 3), phase2_state and,
+    with ?include=quiz, the Phase 1 questions.
+    """
+    email = session.get('user_email')
+    if not email:
+        return jsonify({"success": False, "error": "Authentication required"}), 401
+
+    include = set(filter(None, request.args.get('include', '').split(',')))
+
+    try:
+        row = db_fetch_one(
+            """SELECT phase1_score, phase2_score, phase3_score, total_score, phase2_completed, phase2_state
+               FROM participants WHERE email = %s""",
+            (email,),
+            readonly=True
+        )
+    except Exception as e:
+        app.logger.error(f"[BOOTSTRAP] Error fetching from DB: {str(e)}")
+        row = None
+
+    if row:
+        phase1_completed, phase2_completed, phase3_completed = derive_phase_flags(row)
+        phase1_score = row.get('phase1_score') or 0
+        phase2_score = row.get('phase2_score') or 0
+        phase3_score = row.get('phase3_score')
+        phase2_state = row.get('phase2_state') or {}
+
+        # Keep the session in step, as /api/status and /api/phase2/sync do
+        session['phase1_completed'] = phase1_completed
+        session['phase2_completed'] = phase2_completed
+        session['phase3_completed'] = phase3_completed
+        session['phase1_score'] = phase1_score
+        session['phase2_score'] = phase2_score
+        session['phase3_score'] = phase3_score
+        if phase2_state:
+            session['phase2_state'] = phase2_state
+            session['bst_score'] = phase2_state.get('bst_score', 0)
+            session['rb_score'] = phase2_state.get('rb_score', 0)
+            session['detective_score'] = phase2_state.get('detective_score', 0)
+            session['traversal_score'] = phase2_state.get('traversal_score', 0)
+    else:
+        # DB unavailable - fall back to session, as /api/status does
+        phase1_completed = session.get('phase1_completed', False)
+        phase2_completed = session.get('phase2_completed', False)
+        phase3_completed = session.get('phase3_completed', False)
+        phase1_score = session.get('phase1_score', 0)
+        phase2_score = session.get('phase2_score', 0)
+        phase3_score = session.get('phase3_score')
+        phase2_state = session.get('phase2_state', {})
+
+    # CRITICAL RULE: Scores visible ONLY if phase3_score IS NOT NULL
+    scores_visible = phase3_score is not None
+
+    result = {
+        "success": True,
+        "phase1_completed": phase1_completed,
+        "phase2_completed": phase2_completed,
+        "phase3_completed": phase3_completed,
+        "scores_visible": scores_visible,
+        "phase1_score": phase1_score if scores_visible else None,
+        "phase2_score": phase2_score if scores_visible else None,
+        "phase3_score": phase3_score if scores_visible else None,
+        "total_score": (phase1_score + phase2_score + phase3_score) if scores_visible else None,
+        "phase2_state": phase2_state
+    }
+    if 'quiz' in include:
+        result["quiz"] = build_quiz_payload()
+
+    return jsonify(result)
+
+# --- HEALTH & WARM-UP ---
+
+WARMUP_DB_SECONDS = float(os.environ.get('WARMUP_DB_SECONDS', 30))
+WARMUP_REPLICA_CONNECTIONS = int(os.environ.get('WARMUP_REPLICA_CONNECTIONS', 2))
+
+def warm_database():
+    """Connect and query until Neon answers (it may be resuming from suspend)."""
+    if not DATABASE_URL:
+        return "skipped: DATABASE_URL not set"
+    deadline = time.monotonic() + WARMUP_DB_SECONDS
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            with get_db() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+            return {"attempts": attempts}
+        except Exception:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(1)
+
+def warm_read_replica():
+    if read_replica is None:
+        return "skipped: DATABASE_READ_URL not set"
+    return {"connections": read_replica.prewarm(WARMUP_REPLICA_CONNECTIONS)}
+
+def warm_quiz_bank():
+    # Also warms the JSON provider on the largest payload we serve
+    bank = quiz_bank.current
+    return {"version": bank.version, "bytes": len(app.json.dumps(list(bank.public)))}
+
+def warm_templates():
+    pages = sorted(name for name in os.listdir(TEMPLATE_DIR) if name.endswith('.html'))
+    for name in pages:
+        app.jinja_env.get_template(name)
+    return {"templates": len(pages)}
+
+def warm_score_caches():
+    """Wait for the change listener (score cache) and the stats rebuild."""
+    if not DATABASE_URL:
+        return "skipped: DATABASE_URL not set"
+    change_listener.ensure_started()
+    score_aggregates.start_rebuild(get_db, app.logger)
+    deadline = time.monotonic() + WARMUP_DB_SECONDS
+    while not (change_listener.connected and score_aggregates.ready):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"listener connected={change_listener.connected}, stats ready={score_aggregates.ready}")
+        time.sleep(0.1)
+    return {"participants": score_aggregates.participants}
+
+warm_up = WarmUp(app.logger)
+warm_up.add_stage('database', warm_database)
+warm_up.add_stage('read_replica', warm_read_replica)
+warm_up.add_stage('quiz_bank', warm_quiz_bank)
+warm_up.add_stage('templates', warm_templates)
+warm_up.add_stage('score_caches', warm_score_caches)
+
+# Start at import so every worker warms up before its first request arrives
+warm_up.ensure_started()
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the worker is up and serving requests. Never touches the DB."""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 200 once this worker's warm-up has finished, with per-stage timings."""
+    stats = warm_up.stats()
+    if not stats["ready"]:
+        response = jsonify(stats)
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    return jsonify(stats)
+
+# --- ADMIN ---
+
+@app.route('/api/admin/admission', methods=['GET'])
+def admin_admission_stats():
+    """Queue depth, active requests and rejection counts for this worker."""
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(app.extensions['admission'].stats())
+
+@app.route('/api/admin/db', methods=['GET'])
+def admin_db_stats():
+    """Circuit breaker state and write-journal backlog for this worker."""
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({
+        "breaker": db_breaker.stats(),
+        "journal": write_journal.stats(),
+        "cache": participant_cache.stats(),
+        "listener": change_listener.stats(),
+        "replica": read_replica.stats() if read_replica else None
+    })
+
+@app.route('/api/admin/stats', methods=['GET'])
+def admin_stats():
+    """Live score histogram, phase averages, completion funnel and challenge success rates."""
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(score_aggregates.stats())
+
+@app.route('/api/admin/stats/rebuild', methods=['POST'])
+def admin_stats_rebuild():
+    """Recompute the statistics from a full scan (e.g. after an archival run)."""
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        rebuilt = score_aggregates.rebuild(get_db)
+    except Exception as e:
+        app.logger.error(f"[STATS] Rebuild failed: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+    if not rebuilt:
+        return jsonify({"success": False, "error": "Rebuild already running"}), 409
+    return jsonify({"success": True, "participants": score_aggregates.participants})
+
+@app.route('/api/admin/roster', methods=['POST'])
+def admin_import_roster():
+    """
+    Pre-register participants from a roster CSV (multipart field 'roster' or a
+    text/csv body). ?dry_run=1 validates without writing.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+
+    upload = request.files.get('roster')
+    raw = upload.stream if upload else request.stream
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    dry_run = request.args.get('dry_run') in ('1', 'true')
+
+    try:
+        if dry_run:
+            report = import_roster(None, stream, dry_run=True)
+        else:
+            with get_db() as conn:
+                report = import_roster(conn, stream)
+    except RosterError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"[ROSTER] Import failed: {str(e)}")
+        return jsonify({"success": False, "error": f"Import failed: {str(e)}"}), 500
+
+    app.logger.info(f"[ROSTER] rows={report['rows']}, inserted={report['inserted']}, "
+                    f"already_registered={report['already_registered']}, duplicates={report['duplicates']}, invalid={report['invalid']}")
+    if report['inserted']:
+        threading.Thread(target=score_aggregates.rebuild, args=(get_db,), daemon=True).start()
+    return jsonify({"success": True, **report})
+
+@app.route('/api/admin/quiz', methods=['GET', 'POST'])
+def admin_quiz_bank():
+    """
+    Live question bank version. POST reloads it from QUIZ_BANK_PATH, or with a
+    JSON list body validates it, replaces the file and loads it. Other workers
+    on this instance pick the new file up within QUIZ_BANK_POLL_SECONDS.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == 'POST':
+        raw = request.get_json(silent=True)
+        try:
+            changed, bank = quiz_bank.write(raw) if raw is not None else quiz_bank.reload()
+        except QuizBankError as e:
+            app.logger.warning(f"[QUIZ] Rejected question bank: {str(e)}")
+            return jsonify({"success": False, "errors": e.problems}), 400
+        except OSError as e:
+            return jsonify({"success": False, "errors": [str(e)]}), 500
+        return jsonify({"success": True, "changed": changed, **quiz_bank.stats()})
+    return jsonify(quiz_bank.stats())
+
+@app.route('/api/admin/profile', methods=['GET', 'POST'])
+def admin_profile():
+    """
+    Per-endpoint allocation and CPU profile for this worker. POST toggles it:
+    {"memory": bool, "cpu": bool, "sample_rate": float, "reset": bool}.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    profiler = app.extensions['profiler']
+    if request.method == 'POST':
+        options = request.get_json(silent=True) or {}
+        try:
+            profiler.configure(options)
+        except (TypeError, ValueError) as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        app.logger.info(f"[PROFILE] memory={profiler.memory.enabled}, cpu={profiler.cpu.enabled}, "
+                        f"sample_rate={profiler.memory.sample_rate}")
+    return jsonify(profiler.report())
+
+@app.route('/api/admin/profile/dump', methods=['POST'])
+def admin_profile_dump():
+    """Full profile (with collapsed CPU stacks), also saved under PROFILE_DUMP_DIR if set."""
+    if not is_admin_request():
+        return jsonify({"error": "Forbidden"}), 403
+    report, path = app.extensions['profiler'].dump()
+    if path:
+        app.logger.info(f"[PROFILE] Dumped profile to {path}")
+    return jsonify({"success": True, "path": path, "report": report})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,292 @@
+"""
+Event archival: move a finished event's participant rows out of the hot
+`participants` table into compressed, checksummed archive files.
+
+    cd backend
+    python archive.py export  --event spring-2026 --to 2026-04-01 --out archives/spring-2026
+    python archive.py export  --event spring-2026 --to 2026-04-01 --include-unclaimed --out archives/spring-2026
+    python archive.py verify  archives/spring-2026
+    python archive.py prune   archives/spring-2026          # deletes the archived rows in batches
+    python archive.py query   archives/spring-2026 --top 10
+    python archive.py query   archives/spring-2026 --sql "SELECT AVG(total_score) FROM participants"
+
+An archive is a directory of gzip JSONL chunks plus `manifest.json`
+(event name, row filter, row counts and a SHA-256 per chunk). `prune`
+re-verifies the checksums before deleting anything, and only deletes a row
+whose updated_at still equals the archived version, so a participant who
+was active again after the export is left alone.
+
+Pre-registered participants who never logged in have updated_at = NULL and
+match no window. `--include-unclaimed` archives them too; the table has no
+event column, so only use it once no roster for a later event is loaded.
+
+Running workers keep their stats counters until the next rebuild
+(POST /api/admin/stats/rebuild).
+"""
+import argparse
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, datetime
+
+MANIFEST = 'manifest.json'
+FORMAT = 'jsonl.gz'
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _window_sql(window):
+    clauses = ["updated_at < %(to)s"]
+    if window.get('from'):
+        clauses.append("updated_at >= %(from)s")
+    sql = " AND ".join(clauses)
+    if window.get('include_unclaimed'):
+        sql = f"({sql}) OR updated_at IS NULL"
+    return sql
+
+
+def export_event(conn, event, out_dir, window, chunk_rows=10000):
+    """Stream matching rows into chunk files and write the manifest last."""
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(os.path.join(out_dir, MANIFEST)):
+        raise SystemExit(f"{out_dir} already contains an archive")
+
+    chunks = []
+    columns = None
+    total = 0
+    unclaimed = 0
+    current = None
+
+    def close_chunk():
+        fh, path, info = current
+        fh.close()
+        info["sha256"] = _sha256(path)
+        info["bytes"] = os.path.getsize(path)
+        chunks.append(info)
+
+    with conn.cursor(name='archive_export') as cur:
+        cur.itersize = 2000
+        cur.execute(f"SELECT * FROM participants WHERE {_window_sql(window)} ORDER BY email", window)
+        for row in cur:
+            if columns is None:
+                columns = [d[0] for d in cur.description]
+            if current is None or current[2]["rows"] >= chunk_rows:
+                if current is not None:
+                    close_chunk()
+                name = f"part-{len(chunks):05d}.{FORMAT}"
+                path = os.path.join(out_dir, name)
+                current = (gzip.open(path, 'wt', encoding='utf-8'), path, {"file": name, "rows": 0})
+            record = dict(zip(columns, row))
+            if record.get("updated_at") is None:
+                unclaimed += 1
+            current[0].write(json.dumps(record, default=_json_default) + "\n")
+            current[2]["rows"] += 1
+            total += 1
+    if current is not None:
+        close_chunk()
+    conn.commit()
+
+    manifest = {
+        "event": event,
+        "format": FORMAT,
+        "created_at": datetime.utcnow().isoformat(),
+        "window": {k: v for k, v in window.items() if v},
+        "columns": columns or [],
+        "row_count": total,
+        "unclaimed_rows": unclaimed,
+        "chunks": chunks,
+    }
+    # Manifest goes in last (atomically) - an archive without one is incomplete
+    tmp = os.path.join(out_dir, MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+class ArchiveReader:
+    """Read-only access to an archive directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+
+    def verify(self):
+        """Returns a list of problems; empty means every chunk checks out."""
+        problems = []
+        counted = 0
+        for chunk in self.manifest["chunks"]:
+            path = os.path.join(self.path, chunk["file"])
+            if not os.path.exists(path):
+                problems.append(f"{chunk['file']}: missing")
+                continue
+            if _sha256(path) != chunk["sha256"]:
+                problems.append(f"{chunk['file']}: checksum mismatch")
+                continue
+            counted += chunk["rows"]
+        if not problems and counted != self.manifest["row_count"]:
+            problems.append(f"row count {counted} != manifest {self.manifest['row_count']}")
+        return problems
+
+    def chunk_rows(self, chunk):
+        with gzip.open(os.path.join(self.path, chunk["file"]), 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def rows(self):
+        for chunk in self.manifest["chunks"]:
+            yield from self.chunk_rows(chunk)
+
+    def to_sqlite(self, db_path=':memory:'):
+        """Load the archive into SQLite as a `participants` table for ad hoc SQL."""
+        columns = self.manifest["columns"]
+        db = sqlite3.connect(db_path)
+        db.execute(f"CREATE TABLE participants ({', '.join(columns)})")
+        placeholders = ", ".join("?" for _ in columns)
+        for row in self.rows():
+            values = [json.dumps(row.get(c)) if isinstance(row.get(c), (dict, list)) else row.get(c) for c in columns]
+            db.execute(f"INSERT INTO participants VALUES ({placeholders})", values)
+        db.commit()
+        return db
+
+
+def prune_event(conn, reader, batch_size=1000):
+    """Delete archived rows from the hot table in batches. Returns rows deleted."""
+    problems = reader.verify()
+    if problems:
+        raise SystemExit("Refusing to prune, archive failed verification:\n  " + "\n  ".join(problems))
+
+    deleted = 0
+    for chunk in reader.manifest["chunks"]:
+        batch = []
+        for row in reader.chunk_rows(chunk):
+            batch.append((row["email"], row.get("updated_at")))
+            if len(batch) >= batch_size:
+                deleted += _delete_batch(conn, batch)
+                batch = []
+        if batch:
+            deleted += _delete_batch(conn, batch)
+    return deleted
+
+
+def _delete_batch(conn, rows):
+    # Match the exact archived version: a row written after the export has a newer updated_at
+    emails = [email for email, _ in rows]
+    updated = [updated_at for _, updated_at in rows]
+    # Short transactions keep locks brief while the event platform is live
+    with conn.cursor() as cur:
+        cur.execute(
+            """DELETE FROM participants p
+               USING unnest(%s::text[], %s::timestamp[]) AS a(email, updated_at)
+               WHERE p.email = a.email AND p.updated_at IS NOT DISTINCT FROM a.updated_at""",
+            (emails, updated)
+        )
+        count = cur.rowcount
+    conn.commit()
+    return count
+
+
+def _connect():
+    import psycopg2
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        raise SystemExit("DATABASE_URL not configured")
+    return psycopg2.connect(database_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('export', help="Write an event's rows to an archive directory")
+    p.add_argument('--event', required=True)
+    p.add_argument('--out', required=True)
+    p.add_argument('--from', dest='from_', help="Archive rows with updated_at >= this timestamp")
+    p.add_argument('--to', required=True, help="Archive rows with updated_at < this timestamp")
+    p.add_argument('--include-unclaimed', action='store_true',
+                   help="Also archive pre-registered rows that never logged in (updated_at IS NULL)")
+    p.add_argument('--chunk-rows', type=int, default=10000)
+
+    p = sub.add_parser('verify', help="Check chunk checksums and row counts")
+    p.add_argument('archive')
+
+    p = sub.add_parser('prune', help="Delete archived rows from the participants table")
+    p.add_argument('archive')
+    p.add_argument('--batch-size', type=int, default=1000)
+
+    p = sub.add_parser('query', help="Query an archive locally (read-only)")
+    p.add_argument('archive')
+    p.add_argument('--email')
+    p.add_argument('--top', type=int, help="Top N participants by total_score")
+    p.add_argument('--sql', help="SQL against a `participants` table (SQLite)")
+
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        window = {"from": args.from_, "to": args.to, "include_unclaimed": args.include_unclaimed}
+        conn = _connect()
+        try:
+            manifest = export_event(conn, args.event, args.out, window, args.chunk_rows)
+        finally:
+            conn.close()
+        print(f"Archived {manifest['row_count']} rows ({manifest['unclaimed_rows']} never logged in) "
+              f"in {len(manifest['chunks'])} chunk(s) to {args.out}")
+
+    elif args.command == 'verify':
+        problems = ArchiveReader(args.archive).verify()
+        if problems:
+            print("\n".join(problems))
+            sys.exit(1)
+        print("OK")
+
+    elif args.command == 'prune':
+        reader = ArchiveReader(args.archive)
+        conn = _connect()
+        try:
+            deleted = prune_event(conn, reader, args.batch_size)
+        finally:
+            conn.close()
+        print(f"Deleted {deleted} of {reader.manifest['row_count']} archived rows from participants")
+
+    elif args.command == 'query':
+        reader = ArchiveReader(args.archive)
+        if args.sql:
+            db = reader.to_sqlite()
+            cur = db.execute(args.sql)
+            print("\t".join(d[0] for d in cur.description))
+            for row in cur:
+                print("\t".join("" if v is None else str(v) for v in row))
+        elif args.email:
+            for row in reader.rows():
+                if row["email"] == args.email:
+                    print(json.dumps(row, indent=2))
+                    break
+            else:
+                sys.exit(f"{args.email} not in archive")
+        else:
+            top = heapq.nlargest(args.top or 10, reader.rows(), key=lambda r: r.get("total_score") or 0)
+            for row in top:
+                print(f"{row.get('total_score') or 0:>5}  {row['name']}  <{row['email']}>")
+
+
+if __name__ == '__main__':
+    main()
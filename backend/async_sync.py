@@ -0,0 +1,408 @@
+"""
+Optional asyncio service for the Phase 2 autosave heartbeat and status
+polling (`POST /api/phase2/sync`, `GET /api/status`).
+
+Under gunicorn every autosave holds a worker thread for two DB round trips.
+This service answers the same two endpoints from one event loop with a
+shared asyncpg pool, so a single process can keep thousands of autosaves
+in flight. Run it next to the Flask app and route those two paths to it
+from the reverse proxy; everything else stays on gunicorn:
+
+    pip install -r requirements-async.txt
+    cd backend && python async_sync.py --port 8081
+
+    # nginx
+    location = /api/phase2/sync { proxy_pass http://127.0.0.1:8081; }
+    location = /api/status      { proxy_pass http://127.0.0.1:8081; }
+    location /                  { proxy_pass http://127.0.0.1:5000; }
+
+It reads and re-signs the Flask session cookie itself (same SECRET_KEY,
+same itsdangerous settings as Flask's SecureCookieSessionInterface) and
+follows sync_phase2 / get_status step for step. Writes notify the other
+workers on `participant_changes`, and while the database is unreachable
+they go to the same local write journal the Flask workers replay.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+from aiohttp import web
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.http import http_date
+
+from admission import BUCKET_IDLE_SECONDS, TokenBucket
+from aggregates import challenge_scores
+from db_journal import CircuitBreaker, WriteJournal
+from json_provider import orjson
+from participant_cache import CACHED_COLUMNS, CHANNEL, change_payload
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Must match the Flask app's session settings
+SECRET_KEY = os.environ.get('SECRET_KEY', 'AVENGERS_ASSEMBLE_SECRET_KEY')
+SESSION_COOKIE_NAME = 'session'
+SESSION_LIFETIME = timedelta(hours=2)  # PERMANENT_SESSION_LIFETIME in app.py
+
+DATABASE_URL = os.environ.get('DATABASE_URL')
+POOL_MIN_SIZE = int(os.environ.get('ASYNC_POOL_MIN_SIZE', 2))
+POOL_MAX_SIZE = int(os.environ.get('ASYNC_POOL_MAX_SIZE', 20))
+# How long a request waits for a pooled connection before it is shed with 503
+ACQUIRE_TIMEOUT = float(os.environ.get('ASYNC_ACQUIRE_TIMEOUT', 10))
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+SYNC_RATE_PER_SECOND = float(os.environ.get('SYNC_RATE_PER_SECOND', 1))
+SYNC_BURST = float(os.environ.get('SYNC_BURST', 5))
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+# Replica reads in the Flask app wait for this session's last write position
+TRACK_COMMIT_LSN = bool(os.environ.get('DATABASE_READ_URL'))
+
+logger = logging.getLogger('async_sync')
+
+CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError,
+                     asyncpg.InterfaceError, asyncpg.CannotConnectNowError)
+
+
+class PoolBusy(Exception):
+    """No pooled connection became free within ACQUIRE_TIMEOUT."""
+
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+# --- SESSION ---
+
+session_serializer = URLSafeTimedSerializer(
+    SECRET_KEY,
+    salt='cookie-session',
+    serializer=TaggedJSONSerializer(),
+    signer_kwargs={'key_derivation': 'hmac', 'digest_method': hashlib.sha1},
+)
+
+
+def load_session(request):
+    cookie = request.cookies.get(SESSION_COOKIE_NAME)
+    if not cookie:
+        return {}
+    try:
+        return session_serializer.loads(cookie, max_age=int(SESSION_LIFETIME.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+def respond(request, session, body, status=200):
+    resp = web.json_response(body, status=status, dumps=dumps)
+    if session:
+        # Same refresh-on-every-request behaviour as Flask for permanent sessions
+        expires = http_date(datetime.utcnow() + SESSION_LIFETIME) if session.get('_permanent') else None
+        resp.set_cookie(SESSION_COOKIE_NAME, session_serializer.dumps(session),
+                        path='/', httponly=True, expires=expires)
+        resp.headers['Vary'] = 'Cookie'
+    if len(resp.body) >= COMPRESS_MIN_SIZE:
+        resp.enable_compression()
+    return resp
+
+
+# --- DATABASE ---
+
+async def init_connection(conn):
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+class Database:
+    def __init__(self):
+        self.pool = None
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.environ.get('DB_BREAKER_FAILURES', 3)),
+            reset_timeout=float(os.environ.get('DB_BREAKER_RESET_SECONDS', 15))
+        )
+        self.journal = WriteJournal(os.environ.get('WRITE_JOURNAL_PATH', os.path.join(BASE_DIR, 'write_journal.sqlite3')))
+
+    async def start(self, app):
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL not configured")
+        # statement_cache_size=0: Neon's pooled endpoint (PgBouncer) can't hold prepared statements
+        self.pool = await asyncpg.create_pool(
+            DATABASE_URL, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+            timeout=DB_CONNECT_TIMEOUT, statement_cache_size=0, init=init_connection
+        )
+        logger.info(f"[ASYNC DB] Pool ready (min={POOL_MIN_SIZE}, max={POOL_MAX_SIZE})")
+
+    async def stop(self, app):
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def _acquire(self):
+        if not self.breaker.allow():
+            raise ConnectionError("Database circuit open")
+        try:
+            return await self.pool.acquire(timeout=ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Pool exhausted or a new connection timed out - only the latter is the DB's fault
+            if self.pool.get_size() < POOL_MAX_SIZE:
+                self.breaker.record_failure()
+                raise
+            raise PoolBusy()
+        except CONNECTION_ERRORS:
+            self.breaker.record_failure()
+            raise
+
+    async def fetch_row(self, query, *args):
+        conn = await self._acquire()
+        try:
+            row = await conn.fetchrow(query, *args)
+        finally:
+            await self.pool.release(conn)
+        self.breaker.record_success()
+        return dict(row) if row else None
+
+    async def update_phase2_state(self, email, state, previous_state, session):
+        """
+        Mirror of db_update_participant(email, {"phase2_state": state}).
+        Raises PoolBusy when no pooled connection was free; nothing is written then.
+        """
+        if self.breaker.is_open() or await asyncio.to_thread(self.journal.has_pending):
+            await self.journal_update(email, state)
+            return
+
+        # Other workers' aggregates only need challenge scores that changed
+        before = challenge_scores(previous_state or {})
+        changed = {k: v for k, v in challenge_scores(state).items() if before.get(k) != v}
+        try:
+            conn = await self._acquire()
+        except CONNECTION_ERRORS:
+            await self.journal_update(email, state)
+            return
+        try:
+            async with conn.transaction():
+                status = await conn.execute(
+                    "UPDATE participants SET phase2_state = $1, updated_at = $2 WHERE email = $3",
+                    state, datetime.utcnow(), email
+                )
+                if status == 'UPDATE 0':
+                    logger.error(f"[DB ERROR] No rows updated for email={email}")
+                    return
+                payload = change_payload(email, {"phase2_state": state}, extra=changed)
+                if payload is not None:
+                    await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+            if TRACK_COMMIT_LSN:
+                session['db_lsn'] = await conn.fetchval("SELECT pg_current_wal_lsn()::text")
+            self.breaker.record_success()
+        except CONNECTION_ERRORS:
+            self.breaker.record_failure()
+            await self.journal_update(email, state)
+        except Exception as e:
+            logger.error(f"[DB ERROR] DB Update Failed: {str(e)}")
+        finally:
+            await self.pool.release(conn)
+
+    async def journal_update(self, email, state):
+        try:
+            await asyncio.to_thread(self.journal.append, email, {"phase2_state": state}, datetime.utcnow())
+            logger.warning(f"[DB JOURNAL] Database unavailable, journaled update for email={email}, fields=['phase2_state']")
+        except Exception as e:
+            logger.error(f"[DB JOURNAL] DB unavailable and journal write failed: {str(e)}")
+
+
+# --- HANDLERS ---
+
+class SyncRateLimiter:
+    """Per-participant token buckets, same limits as the Flask admission controller."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._last_prune = time.monotonic()
+
+    def take(self, key):
+        now = time.monotonic()
+        if now - self._last_prune > BUCKET_IDLE_SECONDS:
+            self._buckets = {k: b for k, b in self._buckets.items() if now - b.updated < BUCKET_IDLE_SECONDS}
+            self._last_prune = now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(SYNC_RATE_PER_SECOND, SYNC_BURST)
+        return bucket.take()
+
+
+def derive_phase_flags(row):
+    """Same as app.derive_phase_flags."""
+    phase1_completed = row.get('phase1_score') is not None
+    phase2_completed = bool(row.get('phase2_completed')) or (row.get('phase2_score') is not None)
+    phase3_completed = row.get('phase3_score') is not None
+    return phase1_completed, phase2_completed, phase3_completed
+
+
+def busy_response():
+    resp = web.json_response({"success": False, "error": "Server busy, retry shortly"}, status=503)
+    resp.headers['Retry-After'] = '1'
+    return resp
+
+
+async def sync_phase2(request):
+    """Same steps and merge semantics as sync_phase2 in app.py."""
+    db = request.app['db']
+    session = load_session(request)
+    email = session.get('user_email')
+    if not email:
+        return web.json_response({"error": "Auth required"}, status=401)
+
+    allowed, wait = request.app['rate_limiter'].take(email)
+    if not allowed:
+        retry_after = max(1, int(wait + 0.999))
+        resp = web.json_response({"success": False, "error": "Too many requests", "retry_after": retry_after}, status=429)
+        resp.headers['Retry-After'] = str(retry_after)
+        return resp
+
+    # Fetch from DB first to restore state
+    db_state = {}
+    try:
+        row = await db.fetch_row("SELECT phase2_state, phase2_completed FROM participants WHERE email = $1", email)
+        if row:
+            db_state = row.get('phase2_state') or {}
+            db_completed = row.get('phase2_completed', False)
+
+            if db_state:
+                session['phase2_state'] = db_state
+                session['bst_score'] = db_state.get('bst_score', 0)
+                session['rb_score'] = db_state.get('rb_score', 0)
+                session['detective_score'] = db_state.get('detective_score', 0)
+                session['traversal_score'] = db_state.get('traversal_score', 0)
+
+            if db_completed:
+                session['phase2_completed'] = True
+                return respond(request, session, {"success": True, "completed": True, "state": db_state})
+    except PoolBusy:
+        return busy_response()
+    except Exception as e:
+        logger.warning(f"[PHASE2 SYNC] Error fetching from DB: {str(e)}")
+
+    # Initialize scores if first time
+    if session.get('bst_score') is None and not session.get('phase2_completed'):
+        session['bst_score'] = 0
+        session['rb_score'] = 0
+        session['detective_score'] = 0
+        session['traversal_score'] = 0
+
+    body = None
+    if request.can_read_body:
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "Invalid JSON"}, status=400)
+    client_state = body.get('state') if isinstance(body, dict) else None
+    if client_state and not session.get('phase2_completed'):
+        # Merge state into session
+        current = session.get('phase2_state', {})
+        current.update(client_state)
+        session['phase2_state'] = current
+
+        # Save to DB for persistence (only phase2_state, no timer fields)
+        try:
+            await db.update_phase2_state(email, current, db_state, session)
+        except PoolBusy:
+            # Nothing was stored - the client retries after Retry-After instead of trusting a 200
+            logger.warning(f"[ASYNC DB] Pool busy, sync for email={email} not persisted")
+            return busy_response()
+
+    return respond(request, session, {
+        "success": True,
+        "completed": session.get('phase2_completed', False),
+        "state": session.get('phase2_state', {})
+    })
+
+
+async def get_status(request):
+    """Same response and session updates as get_status in app.py."""
+    session = load_session(request)
+    email = session.get('user_email')
+    if not email:
+        return respond(request, session, {
+            "phase1_completed": False,
+            "phase2_completed": False,
+            "phase3_completed": False,
+            "phase1_score": 0,
+            "phase2_score": 0,
+            "phase3_score": 0
+        })
+
+    phase1_completed = phase2_completed = phase3_completed = False
+    phase1_score = phase2_score = phase3_score = 0
+    try:
+        row = await request.app['db'].fetch_row(
+            f"SELECT {', '.join(CACHED_COLUMNS)} FROM participants WHERE email = $1", email
+        )
+        if row:
+            phase1_score = row.get('phase1_score') or 0
+            phase2_score = row.get('phase2_score') or 0
+            phase3_score = row.get('phase3_score') or 0
+            phase1_completed, phase2_completed, phase3_completed = derive_phase_flags(row)
+
+            session['phase1_completed'] = phase1_completed
+            session['phase2_completed'] = phase2_completed
+            session['phase3_completed'] = phase3_completed
+            session['phase1_score'] = phase1_score
+            session['phase2_score'] = phase2_score
+            session['phase3_score'] = phase3_score
+    except PoolBusy:
+        return busy_response()
+    except Exception as e:
+        logger.error(f"[STATUS] Error fetching from DB: {str(e)}")
+        phase1_completed = session.get('phase1_completed', False)
+        phase2_completed = session.get('phase2_completed', False)
+        phase3_completed = session.get('phase3_completed', False)
+        phase1_score = session.get('phase1_score', 0)
+        phase2_score = session.get('phase2_score', 0)
+        phase3_score = session.get('phase3_score', 0)
+
+    return respond(request, session, {
+        "phase1_completed": phase1_completed,
+        "phase2_completed": phase2_completed,
+        "phase3_completed": phase3_completed,
+        "phase1_score": phase1_score,
+        "phase2_score": phase2_score,
+        "phase3_score": phase3_score
+    })
+
+
+async def healthz(request):
+    db = request.app['db']
+    return web.json_response({
+        "status": "ok",
+        "pool": {"size": db.pool.get_size(), "idle": db.pool.get_idle_size()} if db.pool else None,
+        "breaker": db.breaker.stats(),
+    })
+
+
+def create_app():
+    app = web.Application()
+    app['db'] = Database()
+    app['rate_limiter'] = SyncRateLimiter()
+    app.on_startup.append(app['db'].start)
+    app.on_cleanup.append(app['db'].stop)
+    app.router.add_post('/api/phase2/sync', sync_phase2)
+    app.router.add_get('/api/status', get_status)
+    app.router.add_get('/healthz', healthz)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s in %(module)s: %(message)s')
+    web.run_app(create_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
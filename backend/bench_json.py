@@ -0,0 +1,104 @@
+"""
+Microbenchmark for API response serialization.
+
+Compares Flask's stdlib JSON provider with FastJSONProvider on the payload
+shapes the API actually returns, and shows what gzip saves on each.
+
+    cd backend && python bench_json.py [--rounds 2000] [--participants 500]
+"""
+import argparse
+import gzip
+import os
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import FastJSONProvider, orjson
+from quiz_bank import compile_bank
+
+
+def quiz_payload():
+    """GET /api/quiz"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quiz_bank.json'), 'rb') as f:
+        return list(compile_bank(f.read()).public)
+
+
+def board(prefix, values):
+    return [
+        {"slot": i, "value": str(v), "color": None, "id": f"{prefix}-node-{v}"}
+        for i, v in enumerate(values, start=1)
+    ]
+
+
+def sync_payload():
+    """POST /api/phase2/sync - full phase2_state echoed on every autosave"""
+    state = {
+        "bst_state": board('bst', [50, 30, 70, 20, 40, 60, 80]),
+        "rb_state": [{"id": f"rb-node-{i}", "color": random.choice(['red', 'black'])} for i in range(1, 8)],
+        "detective_state": board('det', [50, 30, 70, 20, 60, 40, 80]),
+        "traversal_state": board('trav', [20, 30, 40, 50, 60, 70, 80]),
+        "bst_score": 25,
+        "rb_score": 0,
+        "detective_score": 25,
+        "traversal_score": 0,
+    }
+    return {"success": True, "completed": False, "state": state}
+
+
+def leaderboard_payload(participants):
+    """Leaderboard / score export rows"""
+    start = datetime(2026, 1, 1, 10, 0, 0)
+    rows = []
+    for i in range(participants):
+        p1, p2, p3 = random.randint(0, 50), random.randint(0, 100), random.randint(0, 100)
+        rows.append({
+            "email": f"participant{i}@example.com",
+            "name": f"Participant {i}",
+            "phase1_score": p1,
+            "phase2_score": p2,
+            "phase3_score": p3,
+            "total_score": p1 + p2 + p3,
+            "updated_at": start + timedelta(seconds=random.randint(0, 10800)),
+        })
+    rows.sort(key=lambda r: r["total_score"], reverse=True)
+    return rows
+
+
+def bench(provider, obj, rounds):
+    seconds = timeit.timeit(lambda: provider.dumps(obj), number=rounds)
+    return seconds / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--participants', type=int, default=500)
+    args = parser.parse_args()
+
+    random.seed(42)
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    payloads = [
+        ("get_quiz", quiz_payload()),
+        ("sync_phase2", sync_payload()),
+        (f"leaderboard[{args.participants}]", leaderboard_payload(args.participants)),
+    ]
+
+    print(f"fast provider backend: {'orjson ' + orjson.__version__ if orjson else 'stdlib (orjson not installed)'}")
+    print(f"{'payload':<20}{'bytes':>9}{'gzip':>9}{'stdlib us':>12}{'fast us':>10}{'speedup':>9}")
+    for name, obj in payloads:
+        body = stdlib.dumps(obj).encode()
+        assert fast.loads(fast.dumps(obj)) == stdlib.loads(stdlib.dumps(obj)), name
+        slow_us = bench(stdlib, obj, args.rounds)
+        fast_us = bench(fast, obj, args.rounds)
+        print(f"{name:<20}{len(body):>9}{len(gzip.compress(body, 6)):>9}"
+              f"{slow_us:>12.1f}{fast_us:>10.1f}{slow_us / fast_us:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+gzip compression for API responses, negotiated through Accept-Encoding.
+Small bodies are sent as-is: below a few hundred bytes gzip costs more CPU
+than it saves on the wire.
+"""
+import gzip
+
+from flask import request
+
+
+def init_app(app):
+    min_size = int(app.config.get('COMPRESS_MIN_SIZE', 1024))
+    level = int(app.config.get('COMPRESS_LEVEL', 6))
+
+    @app.after_request
+    def compress_response(response):
+        if not request.path.startswith('/api/'):
+            return response
+        if response.direct_passthrough or response.status_code < 200 or response.status_code >= 300:
+            return response
+        if 'Content-Encoding' in response.headers:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if not request.accept_encodings['gzip']:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
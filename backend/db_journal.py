@@ -0,0 +1,237 @@
+"""
+Degraded-mode writes for when the database is unreachable.
+
+A circuit breaker sits in front of `get_db()`. After a few consecutive
+connection failures it opens and DB calls fail immediately instead of each
+waiting for a connect timeout. While it is open (or while older entries are
+still waiting to be replayed) participant updates are appended to a local,
+fsync'd SQLite journal and acknowledged. A background replayer applies the
+journal to Postgres in order once the breaker lets a probe through again.
+"""
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entries that keep failing for non-connection reasons are parked after this many attempts
+MAX_REPLAY_ATTEMPTS = 5
+REPLAY_BATCH_SIZE = 50
+
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    email        TEXT NOT NULL,
+    fields       TEXT NOT NULL,
+    journaled_at TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT
+);
+CREATE TABLE IF NOT EXISTS dead_letter (
+    id           INTEGER PRIMARY KEY,
+    email        TEXT NOT NULL,
+    fields       TEXT NOT NULL,
+    journaled_at TEXT NOT NULL,
+    last_error   TEXT
+);
+"""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of connecting while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    closed    -> calls go through; `failure_threshold` consecutive failures open it
+    open      -> calls fail fast for `reset_timeout` seconds
+    half_open -> a single probe is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=15):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def is_open(self):
+        return self.state != 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class WriteJournal:
+    """Append-only SQLite journal shared by all workers on this instance."""
+
+    def __init__(self, path):
+        # Relative paths are relative to backend/, whatever directory the app was started from
+        self.path = os.path.join(BASE_DIR, path)
+        self.lock_path = self.path + '.lock'
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Reopen after fork - SQLite connections must not cross processes
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(JOURNAL_SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def append(self, email, fields, journaled_at):
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO journal (email, fields, journaled_at) VALUES (?, ?, ?)",
+                (email, json.dumps(fields), journaled_at.isoformat())
+            )
+
+    def has_pending(self):
+        if not os.path.exists(self.path):
+            return False
+        with self._lock:
+            return self._connection().execute("SELECT 1 FROM journal LIMIT 1").fetchone() is not None
+
+    def oldest(self, limit):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, email, fields, journaled_at, attempts FROM journal ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [(rid, email, json.loads(fields), journaled_at, attempts)
+                for rid, email, fields, journaled_at, attempts in rows]
+
+    def remove(self, entry_id):
+        with self._lock:
+            self._connection().execute("DELETE FROM journal WHERE id = ?", (entry_id,))
+
+    def record_error(self, entry_id, error, attempts):
+        with self._lock:
+            conn = self._connection()
+            if attempts >= MAX_REPLAY_ATTEMPTS:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    """INSERT INTO dead_letter (id, email, fields, journaled_at, last_error)
+                       SELECT id, email, fields, journaled_at, ? FROM journal WHERE id = ?""",
+                    (error, entry_id)
+                )
+                conn.execute("DELETE FROM journal WHERE id = ?", (entry_id,))
+                conn.execute("COMMIT")
+            else:
+                conn.execute(
+                    "UPDATE journal SET attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, entry_id)
+                )
+
+    def stats(self):
+        if not os.path.exists(self.path):
+            return {"pending": 0, "dead_letter": 0}
+        with self._lock:
+            conn = self._connection()
+            pending = conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+            dead = conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+        return {"pending": pending, "dead_letter": dead}
+
+
+class JournalReplayer:
+    """
+    Background thread that drains the journal into Postgres in id order.
+    `apply_entry` goes through `get_db()`, so the breaker decides when a
+    replay attempt actually reaches the database. An flock on
+    `<journal>.lock` ensures only one worker replays at a time.
+    """
+
+    def __init__(self, journal, apply_entry, is_connection_error, logger, interval=5):
+        self.journal = journal
+        self.apply_entry = apply_entry
+        self.is_connection_error = is_connection_error
+        self.logger = logger
+        self.interval = interval
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='journal-replayer', daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self.journal.has_pending():
+                    self.replay_once()
+            except Exception as e:
+                self.logger.error(f"[DB JOURNAL] Replayer error: {str(e)}")
+
+    def replay_once(self):
+        with open(self.journal.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0  # Another worker is replaying
+            try:
+                return self._drain()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _drain(self):
+        replayed = 0
+        while True:
+            batch = self.journal.oldest(REPLAY_BATCH_SIZE)
+            if not batch:
+                if replayed:
+                    self.logger.info(f"[DB JOURNAL] Replay complete, {replayed} write(s) applied")
+                return replayed
+            for entry_id, email, fields, journaled_at, attempts in batch:
+                try:
+                    self.apply_entry(email, fields, journaled_at)
+                except Exception as e:
+                    if self.is_connection_error(e):
+                        # Still down - keep the entry and stop; order must be preserved
+                        return replayed
+                    self.logger.error(f"[DB JOURNAL] Replay of entry {entry_id} for email={email} failed: {str(e)}")
+                    self.journal.record_error(entry_id, str(e), attempts + 1)
+                    continue
+                self.journal.remove(entry_id)
+                replayed += 1
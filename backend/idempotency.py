@@ -0,0 +1,308 @@
+"""
+Idempotency-key deduplication for submission endpoints.
+
+Clients send an `Idempotency-Key` header with each submission. The first
+request for a key runs normally and its response is stored; any repeat
+(double click, client retry after a dropped connection) gets the stored
+response back without re-running the read-compute-write cycle.
+
+Responses are kept in a bounded in-process TTL cache and in the
+`idempotency_keys` table so that retries landing on another worker are
+deduplicated too. A first submission costs two statements: claiming the
+key with a pending row before the view runs, and storing the response
+after. A repeat that reaches another worker conflicts with that row and
+gets the stored response, waiting for it if the original is still running.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, session, current_app, Response, jsonify
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# Wait this long for a duplicate that is still being processed (by any worker)
+INFLIGHT_WAIT_SECONDS = 30
+# status_code of a claimed key whose response is not stored yet
+PENDING_STATUS = 0
+# A pending claim this old is assumed abandoned (its worker died) and can be taken over
+PENDING_STALE_SECONDS = 60
+# Expired rows are pruned from the DB at most this often
+PRUNE_INTERVAL_SECONDS = 600
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope_key     TEXT PRIMARY KEY,
+    email         TEXT NOT NULL,
+    endpoint      TEXT NOT NULL,
+    status_code   INTEGER NOT NULL,
+    response_body TEXT NOT NULL,
+    created_at    TIMESTAMP NOT NULL DEFAULT NOW()
+)
+"""
+
+# Inserts a pending row, or takes over an expired key or an abandoned claim.
+# rowcount is 1 when this request now owns the key.
+CLAIM_SQL = """
+INSERT INTO idempotency_keys (scope_key, email, endpoint, status_code, response_body, created_at)
+VALUES (%(scope_key)s, %(email)s, %(endpoint)s, %(pending)s, '', NOW())
+ON CONFLICT (scope_key) DO UPDATE
+    SET email = EXCLUDED.email, endpoint = EXCLUDED.endpoint,
+        status_code = EXCLUDED.status_code, response_body = '', created_at = NOW()
+    WHERE idempotency_keys.created_at <= NOW() - make_interval(secs => %(ttl)s)
+       OR (idempotency_keys.status_code = %(pending)s
+           AND idempotency_keys.created_at <= NOW() - make_interval(secs => %(stale)s))
+"""
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class IdempotencyStore:
+    """Two-level (memory, then DB) store of key -> (status_code, body)."""
+
+    def __init__(self, get_db, logger, ttl_seconds=7200, max_entries=10000):
+        self.get_db = get_db
+        self.logger = logger
+        self.ttl_seconds = ttl_seconds
+        self.cache = TTLCache(max_entries, ttl_seconds)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _ensure_schema(self, cur):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                cur.execute(SCHEMA_SQL)
+                self._schema_ready = True
+
+    def _fetch(self, scope_key):
+        """Unexpired (status_code, body) row for a key, pending claims included."""
+        with self.get_db() as conn:
+            with conn.cursor() as cur:
+                self._ensure_schema(cur)
+                cur.execute(
+                    """SELECT status_code, response_body FROM idempotency_keys
+                       WHERE scope_key = %s AND created_at > NOW() - make_interval(secs => %s)""",
+                    (scope_key, self.ttl_seconds)
+                )
+                row = cur.fetchone()
+            conn.commit()
+        return row
+
+    def claim(self, scope_key, email, endpoint):
+        """
+        Reserve a key in the shared table before running the view.
+        Returns False if a request on another worker holds or has completed it.
+        """
+        try:
+            with self.get_db() as conn:
+                with conn.cursor() as cur:
+                    self._ensure_schema(cur)
+                    cur.execute(CLAIM_SQL, {
+                        "scope_key": scope_key, "email": email, "endpoint": endpoint,
+                        "pending": PENDING_STATUS, "ttl": self.ttl_seconds, "stale": PENDING_STALE_SECONDS,
+                    })
+                    claimed = cur.rowcount == 1
+                conn.commit()
+            return claimed
+        except Exception as e:
+            # Database unavailable - fall back to deduplicating within this worker only
+            self.logger.warning(f"[IDEMPOTENCY] Could not claim key={scope_key}: {str(e)}")
+            return True
+
+    def wait_for(self, scope_key, timeout):
+        """
+        Wait for the response to a key claimed on another worker.
+        Returns None on timeout or if the owner gave up without a final response.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            try:
+                row = self._fetch(scope_key)
+            except Exception as e:
+                self.logger.warning(f"[IDEMPOTENCY] Lookup failed for key={scope_key}: {str(e)}")
+                return None
+            if row is None:
+                return None
+            if row[0] != PENDING_STATUS:
+                stored = (row[0], row[1])
+                self.cache.set(scope_key, stored)
+                return stored
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+
+    def save(self, scope_key, email, endpoint, status_code, body):
+        self.cache.set(scope_key, (status_code, body))
+        try:
+            with self.get_db() as conn:
+                with conn.cursor() as cur:
+                    self._ensure_schema(cur)
+                    # Fills in our pending claim (or inserts, if the claim couldn't be made)
+                    cur.execute(
+                        """INSERT INTO idempotency_keys (scope_key, email, endpoint, status_code, response_body, created_at)
+                           VALUES (%s, %s, %s, %s, %s, NOW())
+                           ON CONFLICT (scope_key) DO UPDATE
+                               SET status_code = EXCLUDED.status_code, response_body = EXCLUDED.response_body,
+                                   created_at = NOW()
+                               WHERE idempotency_keys.status_code = %s""",
+                        (scope_key, email, endpoint, status_code, body, PENDING_STATUS)
+                    )
+                    self._maybe_prune(cur)
+                conn.commit()
+        except Exception as e:
+            # The local cache still deduplicates retries hitting this worker
+            self.logger.warning(f"[IDEMPOTENCY] Could not persist key={scope_key}: {str(e)}")
+
+    def release(self, scope_key):
+        """Drop our pending claim when the outcome isn't final, so a retry runs the view again."""
+        try:
+            with self.get_db() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        "DELETE FROM idempotency_keys WHERE scope_key = %s AND status_code = %s",
+                        (scope_key, PENDING_STATUS)
+                    )
+                conn.commit()
+        except Exception as e:
+            # Expires as abandoned after PENDING_STALE_SECONDS
+            self.logger.warning(f"[IDEMPOTENCY] Could not release key={scope_key}: {str(e)}")
+
+    def _maybe_prune(self, cur):
+        now = time.monotonic()
+        if now - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = now
+        cur.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < NOW() - make_interval(secs => %s)",
+            (self.ttl_seconds,)
+        )
+
+    def begin(self, scope_key):
+        """
+        Mark a key as in flight in this worker.
+        Returns (True, event) for the owner, (False, event) for a duplicate.
+        """
+        with self._inflight_lock:
+            event = self._inflight.get(scope_key)
+            if event is not None:
+                return False, event
+            event = threading.Event()
+            self._inflight[scope_key] = event
+            return True, event
+
+    def finish(self, scope_key):
+        with self._inflight_lock:
+            event = self._inflight.pop(scope_key, None)
+        if event is not None:
+            event.set()
+
+
+def _replay(stored):
+    status_code, body = stored
+    resp = Response(body, status=status_code, mimetype='application/json')
+    resp.headers['Idempotent-Replayed'] = 'true'
+    return resp
+
+
+def idempotent(view):
+    """
+    Decorator for submission routes. Requests without an Idempotency-Key
+    header (or without a session) run unchanged.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        email = session.get('user_email')
+        store = current_app.extensions.get('idempotency')
+        if not key or not email or store is None:
+            return view(*args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"success": False, "error": "Idempotency-Key too long"}), 400
+
+        scope_key = f"{email}:{view.__name__}:{key}"
+
+        # Memory only: a key stored by another worker is found by claim() below
+        stored = store.cache.get(scope_key)
+        if stored is not None:
+            current_app.logger.info(f"[IDEMPOTENCY] Replaying stored response for {view.__name__}, email={email}")
+            return _replay(stored)
+
+        owner, event = store.begin(scope_key)
+        if not owner:
+            # Same key already running in this worker - wait for its result
+            event.wait(INFLIGHT_WAIT_SECONDS)
+            stored = store.cache.get(scope_key)
+            if stored is not None:
+                return _replay(stored)
+            return jsonify({"success": False, "error": "Duplicate request still in progress"}), 409
+
+        try:
+            if not store.claim(scope_key, email, view.__name__):
+                # Same key running (or just finished) on another worker - wait for its result
+                stored = store.wait_for(scope_key, INFLIGHT_WAIT_SECONDS)
+                if stored is not None:
+                    return _replay(stored)
+                return jsonify({"success": False, "error": "Duplicate request still in progress"}), 409
+
+            try:
+                resp = current_app.make_response(view(*args, **kwargs))
+            except Exception:
+                store.release(scope_key)
+                raise
+            # Only successful or client-error outcomes are final; 5xx may be retried
+            if resp.status_code < 500 and resp.mimetype == 'application/json':
+                store.save(scope_key, email, view.__name__, resp.status_code, resp.get_data(as_text=True))
+            else:
+                store.release(scope_key)
+            return resp
+        finally:
+            store.finish(scope_key)
+
+    return wrapper
+
+
+def init_app(app, get_db):
+    ttl = int(app.config.get('IDEMPOTENCY_TTL_SECONDS', 7200))
+    size = int(app.config.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+    app.extensions['idempotency'] = IdempotencyStore(get_db, app.logger, ttl_seconds=ttl, max_entries=size)
@@ -0,0 +1,46 @@
+"""
+JSON provider for the whole app: orjson when it is installed, Flask's
+stdlib-based provider otherwise. Output stays compatible with the default
+provider (sorted keys, Flask's handling of dates/Decimal/UUID).
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def _options(self):
+        # Hand dates/dataclasses to Flask's `default` so they serialize exactly as before
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # Caller-specific options (indent, separators...) need the stdlib encoder
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        if orjson is None or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # orjson produces bytes - skip the str round trip
+        body = orjson.dumps(obj, default=self.default, option=self._options()) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    app.logger.info(f"[JSON] Using {'orjson' if orjson else 'stdlib json'} provider")
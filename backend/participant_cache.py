@@ -0,0 +1,219 @@
+"""
+Per-worker cache of participant score rows, kept coherent across workers
+and instances with PostgreSQL LISTEN/NOTIFY.
+
+Score writes call `notify_change()` inside their transaction, so the
+notification is delivered only if the write commits. Every worker runs a
+listener thread on a dedicated connection that applies the changed fields
+to its local cache. While the listener is disconnected the cache is
+bypassed (and cleared on reconnect), since notifications may have been
+missed.
+"""
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+CHANNEL = 'participant_changes'
+
+# Columns held in the cache - everything the status/score endpoints read
+CACHED_COLUMNS = ('phase1_score', 'phase2_score', 'phase3_score', 'total_score', 'phase2_completed')
+
+# Identifies this instance; combined with the pid it names a worker
+INSTANCE_ID = uuid.uuid4().hex[:8]
+
+
+def worker_origin():
+    """Origin tag used to skip notifications this worker sent itself."""
+    return f"{INSTANCE_ID}-{os.getpid()}"
+
+
+class ParticipantCache:
+    """
+    Bounded LRU of email -> score row. Reads fill it only if nothing changed
+    since the fetch started (tracked with an epoch counter), so a slow read
+    cannot overwrite a newer notification.
+    """
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self._rows = OrderedDict()
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, email):
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._rows.get(email)
+            if row is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(email)
+            self.hits += 1
+            return dict(row)
+
+    def epoch(self):
+        return self._epoch
+
+    def fill(self, email, row, epoch):
+        """Insert a row read from the DB, unless a change arrived meanwhile."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._rows[email] = {k: row.get(k) for k in CACHED_COLUMNS}
+            self._rows.move_to_end(email)
+            while len(self._rows) > self.max_entries:
+                self._rows.popitem(last=False)
+
+    def apply(self, email, fields):
+        """Apply changed columns to a cached row (rows not cached stay uncached)."""
+        with self._lock:
+            self._epoch += 1
+            row = self._rows.get(email)
+            if row is not None:
+                row.update({k: v for k, v in fields.items() if k in CACHED_COLUMNS})
+
+    def evict(self, email):
+        with self._lock:
+            self._epoch += 1
+            self._rows.pop(email, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._rows.clear()
+
+    def stats(self):
+        return {"enabled": self.enabled, "entries": len(self._rows), "hits": self.hits, "misses": self.misses}
+
+
+def change_payload(email, fields=None, invalidate=False, extra=None):
+    """
+    JSON notification payload for a change, or None if there is nothing to
+    announce. `fields` holds the new values of cached columns; `invalidate`
+    asks listeners to drop the row; `extra` carries small derived values for
+    other handlers (e.g. aggregates).
+    """
+    changed = {k: v for k, v in (fields or {}).items() if k in CACHED_COLUMNS}
+    if not changed and not invalidate and not extra:
+        return None
+    payload = {"origin": worker_origin(), "email": email, "fields": changed, "invalidate": invalidate}
+    if extra:
+        payload["extra"] = extra
+    return json.dumps(payload, default=str)
+
+
+def notify_change(cur, email, fields=None, invalidate=False, extra=None):
+    """Queue a change notification on the current transaction (see change_payload)."""
+    payload = change_payload(email, fields, invalidate, extra)
+    if payload is not None:
+        cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, payload))
+
+
+class NotificationListener:
+    """Background LISTEN loop that dispatches change payloads to handlers."""
+
+    def __init__(self, connect, cache, logger, reconnect_delay=5):
+        self.connect = connect
+        self.cache = cache
+        self.logger = logger
+        self.reconnect_delay = reconnect_delay
+        self.handlers = [self._apply_to_cache]
+        self.reconnect_hooks = []
+        self.connected = False
+        self.connects = 0
+        self.received = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def add_handler(self, handler):
+        """Register `handler(payload)` for changes made by other workers."""
+        self.handlers.append(handler)
+
+    def add_reconnect_hook(self, hook):
+        """Register `hook()`, called each time LISTEN is re-established after a disconnect."""
+        self.reconnect_hooks.append(hook)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='participant-listener', daemon=True).start()
+
+    def _apply_to_cache(self, payload):
+        if payload.get('invalidate'):
+            self.cache.evict(payload['email'])
+        else:
+            self.cache.apply(payload['email'], payload.get('fields', {}))
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                self.logger.warning(f"[NOTIFY] Listener disconnected: {str(e)}")
+            self.connected = False
+            self.cache.enabled = False
+            time.sleep(self.reconnect_delay)
+
+    def _listen(self):
+        conn = self.connect()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            # Anything cached before this point may have missed notifications
+            self.cache.clear()
+            self.cache.enabled = True
+            self.connected = True
+            self.connects += 1
+            self.logger.info(f"[NOTIFY] Listening on {CHANNEL} as {worker_origin()}")
+            if self.connects > 1:
+                for hook in self.reconnect_hooks:
+                    try:
+                        hook()
+                    except Exception as e:
+                        self.logger.error(f"[NOTIFY] Reconnect hook failed: {str(e)}")
+
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    # Idle - make sure the connection is still alive
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                else:
+                    conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    self._dispatch(notify.payload)
+        finally:
+            conn.close()
+
+    def _dispatch(self, raw):
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return
+        if payload.get('origin') == worker_origin():
+            return
+        self.received += 1
+        for handler in self.handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                self.logger.error(f"[NOTIFY] Handler error for email={payload.get('email')}: {str(e)}")
+
+    def stats(self):
+        return {"connected": self.connected, "reconnects": max(0, self.connects - 1),
+                "received": self.received, "origin": worker_origin()}
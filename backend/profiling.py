@@ -0,0 +1,386 @@
+"""
+Opt-in per-route allocation profiling and a sampling CPU profiler.
+
+Allocation profiling (tracemalloc) takes a heap snapshot before and after a
+sampled fraction of requests and records what each request left allocated,
+aggregated per endpoint and per source line. Each allocation is attributed
+both to the line that made it and to the innermost line in this project's
+code on its stack, so e.g. `json.loads` growth shows up under the app line
+that called it. Only one request is sampled at a time, but other requests
+running concurrently on the same worker still allocate, so on a busy
+worker the endpoint attribution is approximate. A snapshot walks the whole
+traced heap and holds the GIL while doing so, so keep the sample rate low
+on a live event.
+
+The CPU profiler is a background thread that samples the stacks of threads
+currently serving a request (wall-clock, so I/O waits show up too) and
+counts them per endpoint and as collapsed stacks for flame graphs.
+
+Both are per worker process and controlled through /api/admin/profile:
+
+    GET  /api/admin/profile                          summary for the worker that answers
+    POST /api/admin/profile {"memory": true, "cpu": true, "sample_rate": 0.05}
+    POST /api/admin/profile {"reset": true}
+    POST /api/admin/profile/dump                     full report (also written to PROFILE_DUMP_DIR)
+
+    cd backend
+    python profiling.py dump --target https://<host> --out profile.json   # needs ADMIN_KEY
+    python profiling.py show profile.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from flask import g, request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bound memory use of the profiler itself
+MAX_LINES = 2000
+MAX_STACKS = 5000
+
+IGNORED_FILES = (tracemalloc.__file__, __file__)
+
+
+def _short(filename):
+    if filename.startswith(BASE_DIR):
+        return os.path.relpath(filename, BASE_DIR)
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+def _is_app_frame(filename):
+    return filename.startswith(BASE_DIR) and 'site-packages' not in filename and filename != __file__
+
+
+class AllocationProfiler:
+    def __init__(self, sample_rate=0.01, frames=16):
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self.enabled = False
+        self._sampling = threading.Lock()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = defaultdict(lambda: {"samples": 0, "net_bytes": 0, "net_blocks": 0, "max_net_bytes": 0})
+            self.lines = defaultdict(lambda: {"net_bytes": 0, "net_blocks": 0, "endpoints": Counter()})
+            self.app_lines = defaultdict(lambda: {"net_bytes": 0, "net_blocks": 0, "endpoints": Counter()})
+
+    def enable(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        # With a sample in flight, end() stops the tracer once it is done
+        if self._sampling.acquire(blocking=False):
+            try:
+                self._stop_tracing()
+            finally:
+                self._sampling.release()
+
+    def _stop_tracing(self):
+        if not self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @staticmethod
+    def _snapshot():
+        # Not filter_traces(): its per-trace fnmatch costs more than the snapshot itself
+        return tracemalloc.take_snapshot()
+
+    def begin(self):
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        if not self._sampling.acquire(blocking=False):
+            return None
+        try:
+            return self._snapshot()
+        except Exception:
+            self._sampling.release()
+            raise
+
+    def end(self, endpoint, before):
+        try:
+            if not tracemalloc.is_tracing():
+                return
+            diffs = self._snapshot().compare_to(before, 'traceback')
+        finally:
+            self._stop_tracing()
+            self._sampling.release()
+
+        total_bytes = 0
+        total_blocks = 0
+        with self._lock:
+            for diff in diffs:
+                if diff.size_diff == 0 and diff.count_diff == 0:
+                    continue
+                tb = diff.traceback
+                # Frames run oldest -> most recent; skip the profiler's own snapshots
+                if tb[-1].filename in IGNORED_FILES:
+                    continue
+                total_bytes += diff.size_diff
+                total_blocks += diff.count_diff
+                self._add(self.lines, f"{_short(tb[-1].filename)}:{tb[-1].lineno}", endpoint, diff)
+                app_frame = next((f for f in reversed(tb) if _is_app_frame(f.filename)), None)
+                if app_frame is not None:
+                    self._add(self.app_lines, f"{_short(app_frame.filename)}:{app_frame.lineno}", endpoint, diff)
+
+            stats = self.endpoints[endpoint]
+            stats["samples"] += 1
+            stats["net_bytes"] += total_bytes
+            stats["net_blocks"] += total_blocks
+            stats["max_net_bytes"] = max(stats["max_net_bytes"], total_bytes)
+
+    @staticmethod
+    def _add(table, key, endpoint, diff):
+        if key not in table and len(table) >= MAX_LINES:
+            return
+        row = table[key]
+        row["net_bytes"] += diff.size_diff
+        row["net_blocks"] += diff.count_diff
+        row["endpoints"][endpoint] += diff.size_diff
+
+    def report(self, limit=25):
+        def top(table):
+            ranked = sorted(table.items(), key=lambda item: item[1]["net_bytes"], reverse=True)[:limit]
+            return [
+                {"line": key, "net_bytes": row["net_bytes"], "net_blocks": row["net_blocks"],
+                 "endpoints": dict(row["endpoints"].most_common(5))}
+                for key, row in ranked
+            ]
+
+        with self._lock:
+            endpoints = {
+                name: {**stats, "avg_net_bytes": round(stats["net_bytes"] / stats["samples"]) if stats["samples"] else 0}
+                for name, stats in sorted(self.endpoints.items(), key=lambda item: item[1]["net_bytes"], reverse=True)
+            }
+            result = {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "endpoints": endpoints,
+                "lines": top(self.lines),
+                "app_lines": top(self.app_lines),
+            }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            result["traced_bytes"] = {"current": current, "peak": peak}
+        return result
+
+
+class StackSampler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.enabled = False
+        self.active = {}  # thread id -> endpoint being served
+        self._lock = threading.Lock()
+        self._pid = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.samples = 0
+            self.endpoint_samples = Counter()
+            self.self_samples = Counter()
+            self.stacks = Counter()
+
+    def enable(self):
+        self.enabled = True
+        self.ensure_started()
+
+    def ensure_started(self):
+        # Threads don't survive a fork, so each worker process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='cpu-sampler', daemon=True).start()
+
+    def disable(self):
+        self.enabled = False
+
+    def _run(self):
+        while self.enabled:
+            self._sample()
+            time.sleep(self.interval)
+        self._pid = None
+
+    def _sample(self):
+        frames = sys._current_frames()
+        with self._lock:
+            for thread_id, endpoint in list(self.active.items()):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{_short(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples += 1
+                self.endpoint_samples[endpoint] += 1
+                self.self_samples[stack[0]] += 1
+                key = ';'.join([endpoint] + stack[::-1])
+                if key in self.stacks or len(self.stacks) < MAX_STACKS:
+                    self.stacks[key] += 1
+
+    def report(self, limit=25, include_stacks=False):
+        with self._lock:
+            result = {
+                "enabled": self.enabled,
+                "interval_ms": self.interval * 1000,
+                "samples": self.samples,
+                "endpoints": dict(self.endpoint_samples.most_common()),
+                "top_functions": [{"function": name, "samples": count} for name, count in self.self_samples.most_common(limit)],
+            }
+            if include_stacks:
+                # "frame;frame;frame count" lines, ready for flamegraph.pl / speedscope
+                result["collapsed_stacks"] = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return result
+
+
+class Profiler:
+    def __init__(self, dump_dir=None, sample_rate=0.01, frames=16, cpu_interval=0.005):
+        # Relative paths are relative to backend/, whatever directory the app was started from
+        self.dump_dir = os.path.join(BASE_DIR, dump_dir) if dump_dir else None
+        self.memory = AllocationProfiler(sample_rate, frames)
+        self.cpu = StackSampler(cpu_interval)
+
+    def configure(self, options):
+        if 'sample_rate' in options:
+            self.memory.sample_rate = min(max(float(options['sample_rate']), 0.0), 1.0)
+        if options.get('reset'):
+            self.memory.reset()
+            self.cpu.reset()
+        if 'memory' in options:
+            self.memory.enable() if options['memory'] else self.memory.disable()
+        if 'cpu' in options:
+            self.cpu.enable() if options['cpu'] else self.cpu.disable()
+
+    def report(self, full=False):
+        limit = 100 if full else 25
+        return {
+            "pid": os.getpid(),
+            "generated_at": time.time(),
+            "memory": self.memory.report(limit),
+            "cpu": self.cpu.report(limit, include_stacks=full),
+        }
+
+    def dump(self):
+        """Full report; also written to dump_dir (if configured). Returns (report, path)."""
+        report = self.report(full=True)
+        path = None
+        if self.dump_dir:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            path = os.path.join(self.dump_dir, f"profile-{os.getpid()}-{int(time.time())}.json")
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+        return report, path
+
+
+def init_app(app):
+    profiler = Profiler(
+        dump_dir=app.config.get('PROFILE_DUMP_DIR'),
+        sample_rate=float(app.config.get('PROFILE_SAMPLE_RATE', 0.01)),
+        frames=int(app.config.get('PROFILE_TRACE_FRAMES', 16)),
+        cpu_interval=float(app.config.get('PROFILE_CPU_INTERVAL', 0.005)),
+    )
+    app.extensions['profiler'] = profiler
+    if app.config.get('PROFILE_MEMORY'):
+        profiler.memory.enable()
+        app.logger.info(f"[PROFILE] Allocation profiling on, sampling {profiler.memory.sample_rate:.0%} of requests")
+    if app.config.get('PROFILE_CPU'):
+        profiler.cpu.enable()
+
+    @app.before_request
+    def profile_start():
+        if request.path.startswith('/api/admin/'):
+            return
+        if profiler.cpu.enabled:
+            profiler.cpu.ensure_started()
+            profiler.cpu.active[threading.get_ident()] = request.endpoint or request.path
+        if profiler.memory.enabled:
+            g.profile_snapshot = profiler.memory.begin()
+
+    @app.teardown_request
+    def profile_finish(exc):
+        profiler.cpu.active.pop(threading.get_ident(), None)
+        snapshot = g.pop('profile_snapshot', None)
+        if snapshot is not None:
+            try:
+                profiler.memory.end(request.endpoint or request.path, snapshot)
+            except Exception as e:
+                app.logger.warning(f"[PROFILE] Failed to record allocation sample: {str(e)}")
+
+    return profiler
+
+
+def _print_report(report):
+    memory = report["memory"]
+    print(f"pid {report['pid']} - allocation profiling {'on' if memory['enabled'] else 'off'}, "
+          f"sample rate {memory['sample_rate']}")
+    print(f"\n{'endpoint':<32}{'samples':>9}{'avg net KiB':>14}{'max net KiB':>14}")
+    for name, stats in memory["endpoints"].items():
+        print(f"{name:<32}{stats['samples']:>9}{stats['avg_net_bytes'] / 1024:>14.1f}{stats['max_net_bytes'] / 1024:>14.1f}")
+    for title, key in (("allocating line", "lines"), ("app line", "app_lines")):
+        print(f"\n{title:<48}{'net KiB':>10}{'blocks':>10}  top endpoint")
+        for row in memory[key][:20]:
+            top = next(iter(row["endpoints"]), '')
+            print(f"{row['line']:<48}{row['net_bytes'] / 1024:>10.1f}{row['net_blocks']:>10}  {top}")
+
+    cpu = report["cpu"]
+    print(f"\nCPU sampler {'on' if cpu['enabled'] else 'off'}, {cpu['samples']} samples")
+    for name, count in cpu["endpoints"].items():
+        print(f"  {name:<32}{count:>8}")
+    print(f"\n{'function':<60}{'samples':>9}")
+    for row in cpu["top_functions"][:20]:
+        print(f"{row['function']:<60}{row['samples']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('dump', help="Fetch a worker's full report and save it")
+    p.add_argument('--target', default='http://localhost:5000')
+    p.add_argument('--out', required=True)
+    p.add_argument('--stacks', help="Also write collapsed stacks (flamegraph input) to this file")
+
+    p = sub.add_parser('show', help="Print a saved report")
+    p.add_argument('report')
+
+    args = parser.parse_args()
+
+    if args.command == 'dump':
+        import urllib.request
+        admin_key = os.environ.get('ADMIN_KEY')
+        if not admin_key:
+            sys.exit("ADMIN_KEY not configured")
+        req = urllib.request.Request(args.target.rstrip('/') + '/api/admin/profile/dump', data=b'',
+                                     headers={'X-Admin-Key': admin_key}, method='POST')
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            report = json.loads(resp.read())["report"]
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        if args.stacks:
+            with open(args.stacks, 'w') as f:
+                f.write("\n".join(report["cpu"].get("collapsed_stacks", [])) + "\n")
+        print(f"Saved report for worker pid {report['pid']} to {args.out}")
+
+    elif args.command == 'show':
+        with open(args.report) as f:
+            _print_report(json.load(f))
+
+
+if __name__ == '__main__':
+    main()
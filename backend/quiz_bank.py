@@ -0,0 +1,226 @@
+"""
+Phase 1 question bank, loaded from a JSON data file and reloadable without
+a restart.
+
+The file is compiled once into an immutable `CompiledBank`: validated,
+indexed by id, with the public (answer-free) question payloads prebuilt
+and answers kept only as salted SHA-256 digests. Compiled banks are
+memoized by the file's content hash, so touching the file or reverting to
+an earlier version costs nothing.
+
+`QuizBankStore.current` is swapped with a single reference assignment, so
+request handlers read it without a lock: a request that grabs the bank once
+sees one consistent version. Reloads happen from a per-worker mtime
+watcher thread or `POST /api/admin/quiz`; an invalid file is rejected and
+the previous bank stays live.
+"""
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+Question = namedtuple('Question', ['id', 'question', 'options', 'answer_digest'])
+
+# Banks kept compiled by content hash (the live one plus recent ones still
+# needed to grade participants who fetched their questions before a swap)
+MAX_COMPILED = 8
+
+
+class QuizBankError(ValueError):
+    """The bank file is unreadable or fails validation."""
+
+    def __init__(self, problems):
+        self.problems = problems if isinstance(problems, list) else [problems]
+        super().__init__("; ".join(self.problems))
+
+
+def _digest(version, question_id, answer):
+    return hashlib.sha256(f"{version}:{question_id}:{answer}".encode()).hexdigest()
+
+
+def validate(raw):
+    """Returns a list of problems with a parsed bank; empty means valid."""
+    if not isinstance(raw, list) or not raw:
+        return ["bank must be a non-empty JSON list of questions"]
+    problems = []
+    seen = set()
+    for i, q in enumerate(raw):
+        where = f"question #{i + 1}"
+        if not isinstance(q, dict):
+            problems.append(f"{where}: not an object")
+            continue
+        qid = q.get('id')
+        if not isinstance(qid, int) or isinstance(qid, bool):
+            problems.append(f"{where}: id must be an integer")
+        elif qid in seen:
+            problems.append(f"{where}: duplicate id {qid}")
+        else:
+            seen.add(qid)
+            where = f"question id={qid}"
+        if not isinstance(q.get('question'), str) or not q['question'].strip():
+            problems.append(f"{where}: missing question text")
+        options = q.get('options')
+        if not isinstance(options, list) or len(options) < 2 or not all(isinstance(o, str) for o in options):
+            problems.append(f"{where}: options must be a list of at least 2 strings")
+        elif len(set(options)) != len(options):
+            problems.append(f"{where}: duplicate options")
+        elif q.get('answer') not in options:
+            problems.append(f"{where}: answer is not one of the options")
+    return problems
+
+
+class CompiledBank:
+    """Immutable, validated form of one version of the bank file."""
+
+    __slots__ = ('version', 'questions', 'by_id', 'public')
+
+    def __init__(self, version, raw):
+        questions = tuple(
+            Question(q['id'], q['question'], tuple(q['options']), _digest(version, q['id'], q['answer']))
+            for q in raw
+        )
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'questions', questions)
+        object.__setattr__(self, 'by_id', MappingProxyType({q.id: q for q in questions}))
+        # Payloads served by GET /api/quiz - built once, treat as read-only
+        object.__setattr__(self, 'public', tuple(
+            {"id": q.id, "question": q.question, "options": list(q.options)} for q in questions
+        ))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledBank is immutable")
+
+    def __len__(self):
+        return len(self.questions)
+
+    def is_correct(self, question, answer):
+        if not isinstance(answer, str):
+            return False
+        return hmac.compare_digest(_digest(self.version, question.id, answer), question.answer_digest)
+
+    def correct_count(self, answers):
+        """Number of questions answered correctly; `answers` maps str(id) -> option."""
+        return sum(1 for q in self.questions if self.is_correct(q, answers.get(str(q.id))))
+
+
+def compile_bank(data):
+    """Compile raw file bytes. Raises QuizBankError."""
+    version = hashlib.sha256(data).hexdigest()[:16]
+    try:
+        raw = json.loads(data)
+    except ValueError as e:
+        raise QuizBankError(f"invalid JSON: {e}")
+    problems = validate(raw)
+    if problems:
+        raise QuizBankError(problems)
+    return CompiledBank(version, raw)
+
+
+class QuizBankStore:
+    def __init__(self, path, logger, poll_seconds=5):
+        # Relative paths are relative to backend/, whatever directory the app was started from
+        self.path = os.path.join(BASE_DIR, path)
+        self.logger = logger
+        self.poll_seconds = poll_seconds
+        self.loaded_at = None
+        self.last_error = None
+        self._compiled = OrderedDict()
+        self._mtime = None
+        self._reload_lock = threading.Lock()
+        self._pid = None
+        self.current = None
+        # Fail fast at startup - there is no previous bank to fall back to
+        self.reload()
+
+    def get(self, version=None):
+        """The bank with this version if still compiled, else the live one."""
+        if version is not None:
+            bank = self._compiled.get(version)
+            if bank is not None:
+                return bank
+        return self.current
+
+    def reload(self):
+        """
+        Re-read the file and swap it in if its content changed.
+        Returns (changed, bank); raises QuizBankError if the file is invalid.
+        """
+        with self._reload_lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                self.last_error = f"cannot read {self.path}: {e}"
+                raise QuizBankError(self.last_error)
+            self._mtime = mtime
+
+            version = hashlib.sha256(data).hexdigest()[:16]
+            bank = self._compiled.get(version)
+            if bank is None:
+                try:
+                    bank = compile_bank(data)
+                except QuizBankError as e:
+                    self.last_error = str(e)
+                    raise
+                self._compiled[version] = bank
+                while len(self._compiled) > MAX_COMPILED:
+                    self._compiled.popitem(last=False)
+            self._compiled.move_to_end(version)
+            self.last_error = None
+
+            if self.current is not None and self.current.version == version:
+                return False, bank
+            self.current = bank
+            self.loaded_at = time.time()
+            self.logger.info(f"[QUIZ] Loaded question bank version={version} ({len(bank)} questions)")
+            return True, bank
+
+    def write(self, raw):
+        """Validate a new bank, replace the file atomically and load it."""
+        problems = validate(raw)
+        if problems:
+            raise QuizBankError(problems)
+        tmp = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(raw, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp, self.path)
+        return self.reload()
+
+    def ensure_started(self):
+        if self.poll_seconds <= 0 or self._pid == os.getpid():
+            return
+        with self._reload_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._watch, name='quiz-bank-watcher', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                if os.stat(self.path).st_mtime != self._mtime:
+                    self.reload()
+            except QuizBankError as e:
+                self.logger.error(f"[QUIZ] Keeping version={self.current.version}, new bank rejected: {str(e)}")
+            except OSError as e:
+                self.logger.warning(f"[QUIZ] Cannot stat {self.path}: {str(e)}")
+
+    def stats(self):
+        bank = self.current
+        return {
+            "path": self.path,
+            "version": bank.version,
+            "questions": len(bank),
+            "loaded_at": self.loaded_at,
+            "compiled_versions": list(self._compiled),
+            "last_error": self.last_error,
+        }
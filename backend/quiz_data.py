@@ -1,157 +0,0 @@
-# QUIZ_QUESTIONS = [
-#     {
-#         "id": 1,
-#         "question": "Which data structure best represents the multiverse timeline branching?",
-#         "options": ["Stack", "Queue", "Tree", "Graph"],
-#         "answer": "Tree"
-#     },
-#     {
-#         "id": 2,
-#         "question": "What is the time complexity to find the 'Time Stone' in a sorted array using Binary Search?",
-#         "options": ["O(n)", "O(log n)", "O(1)", "O(n log n)"],
-#         "answer": "O(log n)"
-#     },
-#     {
-#         "id": 3,
-#         "question": "If Iron Man's suit OS uses LIFO (Last In First Out), which structure is it using?",
-#         "options": ["Queue", "Stack", "Array", "Linked List"],
-#         "answer": "Stack"
-#     },
-#     {
-#         "id": 4,
-#         "question": "Which sorting algorithm is inevitably linked to 'Divide and Conquer'?",
-#         "options": ["Bubble Sort", "Merge Sort", "Insertion Sort", "Selection Sort"],
-#         "answer": "Merge Sort"
-#     },
-#     {
-#         "id": 5,
-#         "question": "In Python, which keyword is used to create an anonymous function (like a stealth mission)?",
-#         "options": ["def", "lambda", "anon", "func"],
-#         "answer": "lambda"
-#     },
-#     {
-#         "id": 6,
-#         "question": "Which data structure follows the same order as Captain America passing his shield one by one?",
-#         "options": ["Stack", "Queue", "Tree", "Graph"],
-#         "answer": "Queue"
-#     },
-#     {
-#         "id": 7,
-#         "question": "If Iron Man’s suit stores the latest command and executes it first, which structure does it use?",
-#         "options": ["Queue", "Stack", "Array", "Linked List"],
-#         "answer": "Stack"
-#     },
-#     {
-#         "id": 8,
-#         "question": "Which OOPS concept allows Thor’s hammer to behave differently for different Avengers?",
-#         "options": ["Inheritance", "Encapsulation", "Polymorphism", "Abstraction"],
-#         "answer": "Polymorphism"
-#     },
-#     {
-#         "id": 9,
-#         "question": "Which data structure best represents the Avengers’ interconnected communication system?",
-#         "options": ["Array", "Stack", "Queue", "Graph"],
-#         "answer": "Graph"
-#     },
-#     {
-#         "id": 10,
-#         "question": "Hiding Hulk’s internal rage mechanics and exposing only his strength represents which OOPS principle?",
-#         "options": ["Abstraction", "Encapsulation", "Inheritance", "Polymorphism"],
-#         "answer": "Encapsulation"
-#     },
-#     {
-#         "id": 11,
-#         "question": "Doctor Strange explores all possible timelines using recursion. Which traversal best fits this?",
-#         "options": ["BFS", "DFS", "Binary Search", "Linear Search"],
-#         "answer": "DFS"
-#     },
-#     {
-#         "id": 12,
-#         "question": "If Thanos needs to find an Infinity Stone quickly from a sorted vault, which algorithm should he use?",
-#         "options": ["Linear Search", "Binary Search", "DFS", "Bubble Sort"],
-#         "answer": "Binary Search"
-#     },
-#     {
-#         "id": 13,
-#         "question": "Nick Fury creates an abstract class 'Avenger' that enforces fight() for all heroes. This is an example of?",
-#         "options": ["Encapsulation", "Inheritance", "Abstraction", "Overloading"],
-#         "answer": "Abstraction"
-#     },
-#     {
-#         "id": 14,
-#         "question": "Which sorting algorithm best matches splitting Avengers into teams and merging them back strategically?",
-#         "options": ["Selection Sort", "Bubble Sort", "Insertion Sort", "Merge Sort"],
-#         "answer": "Merge Sort"
-#     },
-#     {
-#         "id": 15,
-#         "question": "If Iron Man overrides the fight() method of Avenger class at runtime, which OOPS concept is used?",
-#         "options": ["Compile-time Polymorphism", "Runtime Polymorphism", "Encapsulation", "Abstraction"],
-#         "answer": "Runtime Polymorphism"
-#     }
-
-# ]
-
-QUIZ_QUESTIONS = [
-    {
-        "id": 1,
-        "question": "Which data structure best represents the multiverse timeline branching?",
-        "options": ["Stack", "Queue", "Tree", "Graph"],
-        "answer": "Tree"
-    },
-    {
-        "id": 2,
-        "question": "What is the time complexity to find the 'Time Stone' in a sorted array using Binary Search?",
-        "options": ["O(n)", "O(log n)", "O(1)", "O(n log n)"],
-        "answer": "O(log n)"
-    },
-    {
-        "id": 3,
-        "question": "If Iron Man's suit OS uses LIFO (Last In First Out), which structure is it using?",
-        "options": ["Queue", "Stack", "Array", "Linked List"],
-        "answer": "Stack"
-    },
-    {
-        "id": 4,
-        "question": "Which sorting algorithm is inevitably linked to the 'Divide and Conquer' strategy used by the Avengers?",
-        "options": ["Bubble Sort", "Merge Sort", "Insertion Sort", "Selection Sort"],
-        "answer": "Merge Sort"
-    },
-    {
-        "id": 5,
-        "question": "In Python, which keyword is used to create an anonymous function (like a stealth mission)?",
-        "options": ["def", "lambda", "anon", "func"],
-        "answer": "lambda"
-    },
-    {
-        "id": 6,
-        "question": "Which data structure best represents the Avengers’ fully interconnected communication system?",
-        "options": ["Array", "Stack", "Queue", "Graph"],
-        "answer": "Graph"
-    },
-    {
-        "id": 7,
-        "question": "Which OOPS concept allows Thor’s hammer to behave differently for different Avengers?",
-        "options": ["Inheritance", "Encapsulation", "Polymorphism", "Abstraction"],
-        "answer": "Polymorphism"
-    },
-    {
-        "id": 8,
-        "question": "Hiding Hulk’s internal rage mechanics and exposing only controlled strength represents which OOPS principle?",
-        "options": ["Abstraction", "Encapsulation", "Inheritance", "Polymorphism"],
-        "answer": "Encapsulation"
-    },
-    {
-        "id": 9,
-        "question": "Doctor Strange explores all possible timelines using recursion. Which traversal technique best fits this?",
-        "options": ["BFS", "DFS", "Binary Search", "Linear Search"],
-        "answer": "DFS"
-    },
-    {
-        "id": 10,
-        "question": "Nick Fury creates an abstract base class 'Avenger' that enforces fight() for all heroes. This demonstrates?",
-        "options": ["Encapsulation", "Inheritance", "Abstraction", "Overloading"],
-        "answer": "Abstraction"
-    }
-]
-
@@ -0,0 +1,110 @@
+"""
+Optional read replica (DATABASE_READ_URL) for read-only queries.
+
+Read-your-writes: after each commit the primary's WAL position is stored
+in the participant's session. A replica read first checks that the
+replica has replayed at least that far; if it has not, the caller falls
+back to the primary.
+"""
+import threading
+
+import psycopg2
+import psycopg2.extras
+import psycopg2.pool
+
+from db_journal import CircuitBreaker
+
+
+class ReadReplica:
+    def __init__(self, dsn, max_connections, connect_timeout, logger):
+        self.dsn = dsn
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.logger = logger
+        self.served = 0
+        self.behind = 0
+        self.busy = 0
+        self.errors = 0
+        self.breaker = CircuitBreaker()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        # Created on first use so forked workers never share sockets
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = psycopg2.pool.ThreadedConnectionPool(
+                        0, self.max_connections, self.dsn, connect_timeout=self.connect_timeout
+                    )
+        return self._pool
+
+    def fetch_one(self, query, params, min_lsn=None):
+        """
+        Run a read-only query on the replica.
+        Returns (served, row); served is False when the replica is behind
+        `min_lsn` and the caller should read from the primary instead.
+        """
+        # A dead replica must not cost every read a connect timeout
+        if not self.breaker.allow():
+            return False, None
+        pool = self._get_pool()
+        try:
+            conn = pool.getconn()
+        except psycopg2.pool.PoolError:
+            # Every replica connection is in use - busy, not broken, so the breaker isn't told
+            self.busy += 1
+            return False, None
+        except psycopg2.OperationalError:
+            self.errors += 1
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        broken = False
+        try:
+            conn.autocommit = True
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                if min_lsn:
+                    cur.execute(
+                        "SELECT COALESCE(pg_last_wal_replay_lsn() >= %s::pg_lsn, false) AS caught_up",
+                        (min_lsn,)
+                    )
+                    if not cur.fetchone()['caught_up']:
+                        self.behind += 1
+                        return False, None
+                cur.execute(query, params)
+                row = cur.fetchone()
+            self.served += 1
+            return True, dict(row) if row else None
+        except psycopg2.Error as e:
+            self.errors += 1
+            # Don't return a dead connection to the pool
+            broken = bool(conn.closed) or isinstance(e, psycopg2.OperationalError)
+            raise
+        finally:
+            pool.putconn(conn, close=broken)
+
+    def prewarm(self, count):
+        """Open up to `count` pooled connections now, so early reads skip the connect."""
+        pool = self._get_pool()
+        conns = []
+        try:
+            for _ in range(min(count, self.max_connections)):
+                conn = pool.getconn()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conns.append(conn)
+        finally:
+            for conn in conns:
+                pool.putconn(conn)
+        return len(conns)
+
+    def stats(self):
+        return {
+            "served": self.served,
+            "fell_back_behind": self.behind,
+            "fell_back_pool_busy": self.busy,
+            "errors": self.errors,
+            "breaker": self.breaker.stats()
+        }
@@ -0,0 +1,221 @@
+"""
+Replay captured API traffic (see traffic_capture.py) against a running
+instance and compare latency distributions with the capture.
+
+    cd backend
+    python replay_traffic.py captures/ --target http://localhost:5000
+    python replay_traffic.py captures/ --target http://localhost:5000 --speed 4 --json results.json
+
+Each captured session becomes one replay participant with its own cookie
+jar, sending its requests in the original order and at the original
+offsets (divided by --speed). Request bodies are rebuilt from the recorded
+shapes: same keys, list lengths and string lengths, placeholder values, and
+a synthetic email/name per session and run, so login creates a fresh
+participant even when the same capture is replayed again.
+Requests captured before a session had logged in are replayed anonymously.
+
+Placeholder answers are wrong answers, so the replay exercises the same
+routes, payload sizes and request timing - not the same scores.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from http.cookiejar import CookieJar
+
+
+def load_traces(directory, since=None, until=None):
+    """All trace lines from the capture directory (rotated files included), oldest first."""
+    traces = []
+    for path in glob.glob(os.path.join(directory, 'capture-*.jsonl*')):
+        with open(path) as f:
+            for line in f:
+                try:
+                    trace = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and trace["ts"] < since:
+                    continue
+                if until is not None and trace["ts"] >= until:
+                    continue
+                traces.append(trace)
+    traces.sort(key=lambda t: t["ts"])
+    return traces
+
+
+def synthesize(shape, session_label, key=None):
+    """Build a placeholder JSON value matching a recorded body shape."""
+    if isinstance(shape, dict):
+        return {k: synthesize(v, session_label, k) for k, v in shape.items()}
+    if isinstance(shape, list):
+        length, item = shape
+        return [synthesize(item, session_label) for _ in range(length)]
+    if shape == 'bool':
+        return False
+    if shape == 'int':
+        return 0
+    if shape == 'float':
+        return 0.0
+    if isinstance(shape, str) and shape.startswith('str:'):
+        if key == 'email':
+            return f"replay-{session_label}@example.com"
+        if key in ('name', 'username'):
+            return f"replay-{session_label}"
+        return 'x' * int(shape[4:])
+    return None
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Replayer:
+    def __init__(self, target, traces, speed=1.0, timeout=30):
+        self.target = target.rstrip('/')
+        self.traces = traces
+        self.speed = speed
+        self.timeout = timeout
+        # Keeps participants and idempotency keys from colliding with earlier runs against the same DB
+        self.run_id = uuid.uuid4().hex[:8]
+        self.results = []
+        self._lock = threading.Lock()
+
+    def _send(self, opener, trace, label):
+        url = self.target + trace["route"]
+        if trace.get("args"):
+            url += '?' + urllib.parse.urlencode(trace["args"])
+        data = None
+        headers = {"Accept-Encoding": "gzip"}
+        if "body" in trace:
+            data = json.dumps(synthesize(trace["body"], label)).encode()
+            headers["Content-Type"] = "application/json"
+        if trace.get("idempotency_key"):
+            headers["Idempotency-Key"] = f"{self.run_id}-{trace['idempotency_key']}"
+
+        req = urllib.request.Request(url, data=data, headers=headers, method=trace["method"])
+        started = time.perf_counter()
+        try:
+            with opener.open(req, timeout=self.timeout) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except Exception:
+            status = None
+        return status, (time.perf_counter() - started) * 1000
+
+    def _run_session(self, label, traces, origin, clock_start):
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+        for trace in traces:
+            due = clock_start + (trace["ts"] - origin) / self.speed
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            status, latency_ms = self._send(opener, trace, label)
+            with self._lock:
+                self.results.append({
+                    "route": f"{trace['method']} {trace['route']}",
+                    "captured_ms": trace["duration_ms"],
+                    "captured_status": trace["status"],
+                    "replayed_ms": latency_ms,
+                    "replayed_status": status,
+                    # Requests started behind schedule mean the client side is the bottleneck
+                    "late_ms": max(0.0, -delay * 1000),
+                })
+
+    def run(self):
+        sessions = defaultdict(list)
+        for i, trace in enumerate(self.traces):
+            # Pre-login requests have no session; replay each one on its own
+            sessions[trace["session"] or f"anon-{i}"].append(trace)
+
+        origin = self.traces[0]["ts"]
+        clock_start = time.monotonic() + 0.5
+        threads = [
+            threading.Thread(target=self._run_session, args=(f"{self.run_id}-{label[:12]}", traces, origin, clock_start),
+                             daemon=True)
+            for label, traces in sessions.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.results
+
+
+def summarize(results):
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result["route"]].append(result)
+
+    summary = {}
+    for route, rows in sorted(by_route.items()):
+        captured = [r["captured_ms"] for r in rows]
+        replayed = [r["replayed_ms"] for r in rows if r["replayed_status"] is not None]
+        summary[route] = {
+            "count": len(rows),
+            "captured": {f"p{p}": percentile(captured, p) for p in (50, 95, 99)},
+            "replayed": {f"p{p}": percentile(replayed, p) for p in (50, 95, 99)},
+            "status_mismatches": sum(1 for r in rows if r["replayed_status"] != r["captured_status"]),
+            "errors": sum(1 for r in rows if r["replayed_status"] is None),
+        }
+    return summary
+
+
+def print_summary(summary, results):
+    def fmt(value):
+        return f"{value:8.1f}" if value is not None else "       -"
+
+    print(f"{'route':<38}{'count':>7}   {'captured p50/p95/p99 (ms)':>27}   {'replayed p50/p95/p99 (ms)':>27}  {'status!=':>8}")
+    for route, row in summary.items():
+        cap = "".join(fmt(row["captured"][p]) for p in ("p50", "p95", "p99"))
+        rep = "".join(fmt(row["replayed"][p]) for p in ("p50", "p95", "p99"))
+        print(f"{route:<38}{row['count']:>7}   {cap:>27}   {rep:>27}  {row['status_mismatches']:>8}")
+
+    late = [r["late_ms"] for r in results]
+    if late and percentile(late, 95) > 100:
+        print(f"\nWarning: p95 send delay {percentile(late, 95):.0f} ms behind schedule - "
+              f"replay client is saturated, lower --speed", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('capture_dir')
+    parser.add_argument('--target', default='http://localhost:5000')
+    parser.add_argument('--speed', type=float, default=1.0, help="Time compression factor (2 = twice as fast)")
+    parser.add_argument('--since', type=float, help="Only replay traces at or after this Unix timestamp")
+    parser.add_argument('--until', type=float, help="Only replay traces before this Unix timestamp")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', help="Also write the per-route summary to this file")
+    args = parser.parse_args()
+
+    traces = load_traces(args.capture_dir, args.since, args.until)
+    if not traces:
+        sys.exit(f"No traces found in {args.capture_dir}")
+    span = traces[-1]["ts"] - traces[0]["ts"]
+    print(f"Replaying {len(traces)} requests ({span:.0f}s captured, ~{span / args.speed:.0f}s at {args.speed}x) "
+          f"against {args.target}", file=sys.stderr)
+
+    results = Replayer(args.target, traces, args.speed, args.timeout).run()
+    summary = summarize(results)
+    print_summary(summary, results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Bulk participant pre-registration from a roster CSV.
+
+The roster needs a header row with an `email` column and a `name` (or
+`username`) column. Rows are validated while streaming, valid ones are
+loaded with COPY into a temporary staging table and merged into
+`participants` with a single INSERT ... ON CONFLICT DO NOTHING, so
+existing participants (and their scores) are never touched.
+
+Pre-registered rows have updated_at = NULL until the participant's first
+login, which is how the stats funnel tells "registered" from "logged in".
+
+    cd backend && python roster_import.py roster.csv [--dry-run]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Keep reports small even for huge rosters
+MAX_REPORTED = 100
+
+# Staged CSV stays in memory up to this size, then spills to disk
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+MERGE_SQL = """
+WITH inserted AS (
+    INSERT INTO participants (email, name, phase1_score, phase2_score, phase3_score, total_score, updated_at)
+    SELECT email, name, NULL, NULL, NULL, NULL, NULL FROM roster_staging
+    ON CONFLICT (email) DO NOTHING
+    RETURNING 1
+)
+SELECT COUNT(*) FROM inserted
+"""
+
+
+class RosterError(Exception):
+    """The roster file itself is unusable (e.g. missing columns)."""
+
+
+def _column(fieldnames, *candidates):
+    lookup = {name.strip().lower(): name for name in fieldnames if name}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    return None
+
+
+def validate_roster(text_stream):
+    """
+    Stream the roster, writing valid (email, name) rows to a spooled CSV.
+    Returns (staged_file, report); staged_file is positioned at the start.
+    """
+    reader = csv.DictReader(text_stream)
+    if not reader.fieldnames:
+        raise RosterError("Roster is empty")
+    email_col = _column(reader.fieldnames, 'email')
+    name_col = _column(reader.fieldnames, 'name', 'username')
+    if not email_col or not name_col:
+        raise RosterError("Roster needs 'email' and 'name' columns")
+
+    staged = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode='w+', newline='')
+    writer = csv.writer(staged)
+    seen = set()
+    report = {"rows": 0, "staged": 0, "duplicates": 0, "invalid": 0,
+              "duplicate_emails": [], "invalid_rows": []}
+
+    # Line 1 is the header
+    for line_no, row in enumerate(reader, start=2):
+        report["rows"] += 1
+        email = (row.get(email_col) or '').strip()
+        name = (row.get(name_col) or '').strip()
+
+        reason = None
+        if not EMAIL_RE.match(email):
+            reason = "invalid email"
+        elif not name:
+            reason = "missing name"
+        if reason:
+            report["invalid"] += 1
+            if len(report["invalid_rows"]) < MAX_REPORTED:
+                report["invalid_rows"].append({"line": line_no, "email": email, "reason": reason})
+            continue
+
+        if email in seen:
+            report["duplicates"] += 1
+            if len(report["duplicate_emails"]) < MAX_REPORTED:
+                report["duplicate_emails"].append(email)
+            continue
+        seen.add(email)
+
+        writer.writerow((email, name))
+        report["staged"] += 1
+
+    staged.seek(0)
+    return staged, report
+
+
+def import_roster(conn, text_stream, dry_run=False):
+    """Validate and merge a roster. Returns the report dict."""
+    staged, report = validate_roster(text_stream)
+    report["inserted"] = 0
+    report["already_registered"] = 0
+    if dry_run or report["staged"] == 0:
+        return report
+
+    with staged:
+        with conn.cursor() as cur:
+            cur.execute("CREATE TEMP TABLE roster_staging (email TEXT, name TEXT) ON COMMIT DROP")
+            cur.copy_expert("COPY roster_staging (email, name) FROM STDIN WITH (FORMAT csv)", staged)
+            cur.execute(MERGE_SQL)
+            inserted = cur.fetchone()[0]
+        conn.commit()
+
+    report["inserted"] = inserted
+    report["already_registered"] = report["staged"] - inserted
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('roster', help="CSV file, or - for stdin")
+    parser.add_argument('--dry-run', action='store_true', help="Validate only, don't touch the database")
+    args = parser.parse_args()
+
+    if args.roster == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+    else:
+        stream = open(args.roster, encoding='utf-8-sig', newline='')
+
+    with stream:
+        if args.dry_run:
+            report = import_roster(None, stream, dry_run=True)
+        else:
+            import psycopg2
+            database_url = os.environ.get('DATABASE_URL')
+            if not database_url:
+                sys.exit("DATABASE_URL not configured")
+            conn = psycopg2.connect(database_url)
+            try:
+                report = import_roster(conn, stream)
+            finally:
+                conn.close()
+
+    print(json.dumps(report, indent=2))
+    if not args.dry_run and report["inserted"]:
+        print("Running workers pick up the new rows on their next stats rebuild (POST /api/admin/stats/rebuild).",
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except RosterError as e:
+        sys.exit(f"Roster error: {e}")
@@ -0,0 +1,303 @@
+"""
+Tests for idempotency.py.
+
+The claim / save / release SQL runs against a real Postgres when
+TEST_DATABASE_URL is set (in a throwaway schema); those tests are skipped
+otherwise. Everything else runs without a database.
+"""
+import contextlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pytest
+from flask import Flask, jsonify
+
+import idempotency
+from idempotency import IdempotencyStore, PENDING_STALE_SECONDS, PENDING_STATUS, TTLCache
+
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+logger = logging.getLogger('test_idempotency')
+
+
+# --- TTLCache ---
+
+def test_cache_returns_stored_value():
+    cache = TTLCache(max_entries=10, ttl=60)
+    cache.set('k', (200, '{}'))
+    assert cache.get('k') == (200, '{}')
+    assert cache.get('missing') is None
+
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(idempotency.time, 'monotonic', lambda: now[0])
+    cache = TTLCache(max_entries=10, ttl=60)
+    cache.set('k', (200, '{}'))
+    now[0] += 59
+    assert cache.get('k') == (200, '{}')
+    now[0] += 2
+    assert cache.get('k') is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+# --- Decorator, with the shared table faked in memory ---
+
+class FakeTableStore(IdempotencyStore):
+    """Shared `rows` dict stands in for the table; mirrors CLAIM_SQL's rules."""
+
+    def __init__(self, rows, lock, fail=False):
+        super().__init__(None, logger)
+        self.rows = rows
+        self.lock = lock
+        self.fail = fail
+        self.statements = 0
+
+    def _check(self):
+        self.statements += 1
+        if self.fail:
+            raise ConnectionError("database unreachable")
+
+    def claim(self, scope_key, email, endpoint):
+        try:
+            self._check()
+        except ConnectionError:
+            return True
+        with self.lock:
+            row = self.rows.get(scope_key)
+            if row is None or (row[0] == PENDING_STATUS and time.time() - row[2] >= PENDING_STALE_SECONDS):
+                self.rows[scope_key] = (PENDING_STATUS, '', time.time())
+                return True
+            return False
+
+    def _fetch(self, scope_key):
+        self._check()
+        with self.lock:
+            row = self.rows.get(scope_key)
+            return row[:2] if row else None
+
+    def save(self, scope_key, email, endpoint, status_code, body):
+        self.cache.set(scope_key, (status_code, body))
+        with self.lock:
+            row = self.rows.get(scope_key)
+            if row is None or row[0] == PENDING_STATUS:
+                self.rows[scope_key] = (status_code, body, time.time())
+
+    def release(self, scope_key):
+        with self.lock:
+            if self.rows.get(scope_key, (None,))[0] == PENDING_STATUS:
+                del self.rows[scope_key]
+
+
+def make_worker(rows, lock, calls, status=200, delay=0.0, fail=False):
+    app = Flask(f"worker-{uuid.uuid4().hex[:6]}")
+    app.secret_key = 'test'
+    app.extensions['idempotency'] = store = FakeTableStore(rows, lock, fail=fail)
+
+    @app.route('/submit', methods=['POST'])
+    @idempotency.idempotent
+    def submit():
+        calls.append(app.name)
+        time.sleep(delay)
+        return jsonify({"success": status < 500, "worker": app.name}), status
+
+    return app, store
+
+
+def post(app, key='key-1'):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_email'] = 'player@example.com'
+    return client.post('/submit', headers={'Idempotency-Key': key})
+
+
+def test_first_submission_claims_then_stores():
+    rows, calls = {}, []
+    app, store = make_worker(rows, threading.Lock(), calls)
+    resp = post(app)
+    assert resp.status_code == 200 and calls == [app.name]
+    (status, body, _), = rows.values()
+    assert status == 200 and resp.get_json() == {"success": True, "worker": app.name}
+    # No lookup before the claim - only the claim itself touched the table
+    assert store.statements == 1
+
+
+def test_repeat_on_same_worker_is_served_from_memory():
+    rows, calls = {}, []
+    app, store = make_worker(rows, threading.Lock(), calls)
+    post(app)
+    resp = post(app)
+    assert resp.headers['Idempotent-Replayed'] == 'true'
+    assert calls == [app.name] and store.statements == 1
+
+
+def test_repeat_on_other_worker_replays_stored_response():
+    rows, lock, calls = {}, threading.Lock(), []
+    first, _ = make_worker(rows, lock, calls)
+    second, _ = make_worker(rows, lock, calls)
+    post(first)
+    resp = post(second)
+    assert resp.headers['Idempotent-Replayed'] == 'true'
+    assert resp.get_json()["worker"] == first.name
+    assert calls == [first.name]
+
+
+def test_concurrent_duplicate_on_other_worker_waits_for_original():
+    rows, lock, calls = {}, threading.Lock(), []
+    first, _ = make_worker(rows, lock, calls, delay=0.5)
+    second, _ = make_worker(rows, lock, calls)
+    responses = {}
+    original = threading.Thread(target=lambda: responses.setdefault('first', post(first)))
+    original.start()
+    time.sleep(0.1)
+    responses['second'] = post(second)
+    original.join()
+    assert calls == [first.name]
+    assert responses['second'].status_code == 200
+    assert responses['second'].get_json()["worker"] == first.name
+
+
+def test_server_error_releases_claim_so_retry_runs():
+    rows, lock, calls = {}, threading.Lock(), []
+    failing, _ = make_worker(rows, lock, calls, status=500)
+    healthy, _ = make_worker(rows, lock, calls)
+    assert post(failing).status_code == 500
+    assert rows == {}
+    assert post(healthy).status_code == 200
+    assert calls == [failing.name, healthy.name]
+
+
+def test_abandoned_claim_is_taken_over(monkeypatch):
+    rows, lock, calls = {}, threading.Lock(), []
+    app, _ = make_worker(rows, lock, calls)
+    rows['player@example.com:submit:key-1'] = (PENDING_STATUS, '', time.time() - PENDING_STALE_SECONDS - 1)
+    assert post(app).status_code == 200
+    assert calls == [app.name]
+
+
+def test_live_claim_elsewhere_times_out_with_409(monkeypatch):
+    monkeypatch.setattr(idempotency, 'INFLIGHT_WAIT_SECONDS', 0.3)
+    rows, calls = {'player@example.com:submit:key-1': (PENDING_STATUS, '', time.time())}, []
+    app, _ = make_worker(rows, threading.Lock(), calls)
+    resp = post(app)
+    assert resp.status_code == 409 and calls == []
+
+
+def test_unreachable_database_still_runs_view():
+    calls = []
+    app, _ = make_worker({}, threading.Lock(), calls, fail=True)
+    assert post(app).status_code == 200
+    assert calls == [app.name]
+
+
+def test_wait_for_returns_none_when_owner_released():
+    store = FakeTableStore({}, threading.Lock())
+    started = time.monotonic()
+    assert store.wait_for('gone', timeout=5) is None
+    assert time.monotonic() - started < 1
+
+
+# --- SQL, against a real Postgres ---
+
+@pytest.fixture
+def pg_store():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import psycopg2
+
+    schema = f"idem_test_{uuid.uuid4().hex[:8]}"
+    admin = psycopg2.connect(TEST_DATABASE_URL)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema}")
+
+    @contextlib.contextmanager
+    def get_db():
+        conn = psycopg2.connect(TEST_DATABASE_URL, options=f"-c search_path={schema}")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def execute(sql, params=()):
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+            conn.commit()
+
+    store = IdempotencyStore(get_db, logger, ttl_seconds=3600)
+    store.execute = execute
+    try:
+        yield store
+    finally:
+        admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+def age_row(store, scope_key, seconds):
+    store.execute(
+        "UPDATE idempotency_keys SET created_at = NOW() - make_interval(secs => %s) WHERE scope_key = %s",
+        (seconds, scope_key)
+    )
+
+
+def test_sql_claim_is_exclusive(pg_store):
+    assert pg_store.claim('k', 'a@x', 'submit') is True
+    assert pg_store.claim('k', 'a@x', 'submit') is False
+    assert pg_store._fetch('k') == (PENDING_STATUS, '')
+
+
+def test_sql_save_fills_claim_and_blocks_new_claims(pg_store):
+    pg_store.claim('k', 'a@x', 'submit')
+    pg_store.save('k', 'a@x', 'submit', 200, '{"ok": true}')
+    assert pg_store._fetch('k') == (200, '{"ok": true}')
+    assert pg_store.claim('k', 'a@x', 'submit') is False
+    assert pg_store.wait_for('k', timeout=0) == (200, '{"ok": true}')
+
+
+def test_sql_stale_pending_claim_is_taken_over(pg_store):
+    pg_store.claim('k', 'a@x', 'submit')
+    age_row(pg_store, 'k', PENDING_STALE_SECONDS - 5)
+    assert pg_store.claim('k', 'a@x', 'submit') is False
+    age_row(pg_store, 'k', PENDING_STALE_SECONDS + 1)
+    assert pg_store.claim('k', 'a@x', 'submit') is True
+
+
+def test_sql_completed_row_is_kept_until_ttl(pg_store):
+    pg_store.claim('k', 'a@x', 'submit')
+    pg_store.save('k', 'a@x', 'submit', 200, '{}')
+    age_row(pg_store, 'k', PENDING_STALE_SECONDS + 1)
+    assert pg_store.claim('k', 'a@x', 'submit') is False
+    age_row(pg_store, 'k', pg_store.ttl_seconds + 1)
+    assert pg_store.claim('k', 'a@x', 'submit') is True
+    assert pg_store._fetch('k') == (PENDING_STATUS, '')
+
+
+def test_sql_release_only_drops_pending_rows(pg_store):
+    pg_store.claim('pending', 'a@x', 'submit')
+    pg_store.release('pending')
+    assert pg_store._fetch('pending') is None
+
+    pg_store.claim('done', 'a@x', 'submit')
+    pg_store.save('done', 'a@x', 'submit', 200, '{}')
+    pg_store.release('done')
+    assert pg_store._fetch('done') == (200, '{}')
+
+
+def test_sql_save_does_not_overwrite_completed_row(pg_store):
+    pg_store.claim('k', 'a@x', 'submit')
+    pg_store.save('k', 'a@x', 'submit', 200, '{"first": true}')
+    pg_store.save('k', 'a@x', 'submit', 200, '{"second": true}')
+    assert pg_store._fetch('k') == (200, '{"first": true}')
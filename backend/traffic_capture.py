@@ -0,0 +1,156 @@
+"""
+Opt-in capture of anonymized API request traces for replay (replay_traffic.py).
+
+Enabled by setting TRAFFIC_CAPTURE_DIR. Each worker appends JSON lines to
+its own rotating file (`capture-<pid>.jsonl`), one line per /api/ request:
+
+    {"ts": 1767261600.123, "method": "POST", "route": "/api/phase2/sync",
+     "args": {}, "session": "9f2c...", "status": 200, "duration_ms": 12.4,
+     "body": {"state": {"bst_score": "int", "bst_state": [7, {...}]}}}
+
+Nothing identifying is stored: the session is an HMAC of the participant's
+email under the app secret (stable across workers, so a participant's
+requests can be grouped), and bodies are reduced to their shape - keys,
+value types, string lengths and list lengths.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import g, request, session
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Admin calls are operator traffic, not participant behaviour
+SKIPPED_PREFIXES = ('/api/admin/',)
+
+
+def body_shape(value):
+    """Structure of a JSON value with the data stripped out."""
+    if isinstance(value, dict):
+        return {str(k): body_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        # [length, shape of the first element] - lists in this app are homogeneous
+        return [len(value), body_shape(value[0]) if value else None]
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, str):
+        return f"str:{len(value)}"
+    return None
+
+
+class TrafficCapture:
+    def __init__(self, directory, secret, max_bytes=50 * 1024 * 1024, backups=5, sample_rate=1.0):
+        # Relative paths are relative to backend/, whatever directory the app was started from
+        self.directory = os.path.join(BASE_DIR, directory)
+        self.secret = secret.encode() if isinstance(secret, str) else secret
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.sample_rate = sample_rate
+        self.recorded = 0
+        self._writer = None
+        self._pid = None
+
+    def anonymize(self, value):
+        return hmac.new(self.secret, value.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def sampled(self, session_id):
+        """Sampling is per session, so kept participants keep their whole request stream."""
+        if self.sample_rate >= 1:
+            return True
+        if session_id is None:
+            return random.random() < self.sample_rate
+        return int(session_id[:8], 16) / 0xFFFFFFFF < self.sample_rate
+
+    def _get_writer(self):
+        # One file per worker process - RotatingFileHandler can't be shared across processes
+        if self._pid != os.getpid():
+            os.makedirs(self.directory, exist_ok=True)
+            writer = logging.getLogger(f"traffic_capture.{os.getpid()}")
+            writer.propagate = False
+            writer.setLevel(logging.INFO)
+            handler = RotatingFileHandler(
+                os.path.join(self.directory, f"capture-{os.getpid()}.jsonl"),
+                maxBytes=self.max_bytes, backupCount=self.backups
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            writer.handlers = [handler]
+            self._writer = writer
+            self._pid = os.getpid()
+        return self._writer
+
+    def record(self, response):
+        started = g.pop('capture_started', None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started[1]) * 1000
+
+        email = session.get('user_email')
+        session_id = self.anonymize(email) if email else None
+        if not self.sampled(session_id):
+            return
+
+        trace = {
+            "ts": round(started[0], 3),
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule else request.path,
+            "args": request.args.to_dict(),
+            "session": session_id,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+        }
+        body = request.get_json(silent=True) if request.method in ('POST', 'PUT', 'PATCH') else None
+        if body is not None:
+            trace["body"] = body_shape(body)
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key:
+            # Hashed, but equal keys stay equal so client retries replay as retries
+            trace["idempotency_key"] = self.anonymize(idempotency_key)
+
+        self._get_writer().info(json.dumps(trace, separators=(',', ':')))
+        self.recorded += 1
+
+    def stats(self):
+        return {"enabled": True, "directory": self.directory, "sample_rate": self.sample_rate,
+                "recorded": self.recorded}
+
+
+def init_app(app):
+    directory = app.config.get('TRAFFIC_CAPTURE_DIR')
+    if not directory:
+        return None
+
+    capture = TrafficCapture(
+        directory,
+        app.secret_key,
+        max_bytes=int(app.config.get('TRAFFIC_CAPTURE_MAX_BYTES', 50 * 1024 * 1024)),
+        backups=int(app.config.get('TRAFFIC_CAPTURE_BACKUPS', 5)),
+        sample_rate=float(app.config.get('TRAFFIC_CAPTURE_SAMPLE', 1.0)),
+    )
+    app.extensions['traffic_capture'] = capture
+
+    @app.before_request
+    def capture_start():
+        if request.path.startswith('/api/') and not request.path.startswith(SKIPPED_PREFIXES):
+            g.capture_started = (time.time(), time.perf_counter())
+
+    @app.after_request
+    def capture_finish(response):
+        try:
+            capture.record(response)
+        except Exception as e:
+            # Capture must never break a request
+            app.logger.warning(f"[CAPTURE] Failed to record trace: {str(e)}")
+        return response
+
+    app.logger.info(f"[CAPTURE] Recording API traces to {capture.directory}")
+    return capture
@@ -0,0 +1,74 @@
+"""
+Per-worker startup warm-up, backing the /readyz endpoint.
+
+A fresh worker pays for its first DB connection (Neon may also be waking
+from suspend), first template compiles and the first stats scan. The
+warm-up runs those stages in a background thread as soon as the worker
+starts and records how long each one took. /readyz reports ready once
+every stage has finished; a failed stage is reported but does not hold
+readiness back, because the app already degrades gracefully (journaled
+writes, cache bypass) and an instance that is never ready would be
+restarted by the platform, losing its local write journal.
+"""
+import os
+import threading
+import time
+
+
+class WarmUp:
+    def __init__(self, logger):
+        self.logger = logger
+        self.stages = []
+        self.results = {}
+        self.started_at = None
+        self.finished_at = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, fn):
+        """`fn()` returns an optional detail value, or raises to mark the stage failed."""
+        self.stages.append((name, fn))
+
+    @property
+    def ready(self):
+        return self.finished_at is not None and self._pid == os.getpid()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.results = {}
+            self.finished_at = None
+            threading.Thread(target=self.run, name='warmup', daemon=True).start()
+
+    def run(self):
+        self.started_at = time.time()
+        for name, fn in self.stages:
+            started = time.perf_counter()
+            try:
+                detail = fn()
+                result = {"ok": True}
+                if detail is not None:
+                    result["detail"] = detail
+            except Exception as e:
+                result = {"ok": False, "error": str(e)}
+            result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.results[name] = result
+            if result["ok"]:
+                self.logger.info(f"[WARMUP] {name} done in {result['ms']} ms")
+            else:
+                self.logger.warning(f"[WARMUP] {name} failed after {result['ms']} ms: {result['error']}")
+        self.finished_at = time.time()
+        self.logger.info(f"[WARMUP] Worker ready after {round((self.finished_at - self.started_at) * 1000)} ms")
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "degraded": [name for name, result in self.results.items() if not result["ok"]],
+            "stages": {name: self.results.get(name, {"pending": True}) for name, _ in self.stages},
+            "total_ms": round((self.finished_at - self.started_at) * 1000, 1) if self.ready else None,
+        }
@@ -11,31 +11,28 @@ document.addEventListener('DOMContentLoaded', async () => {
 
 async function initPhase2() {
     try {
-        // Use sync endpoint to get authoritative state
-        const res = await fetch('/api/phase2/sync', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({}) // Empty body just to fetch/start
-        });
+        // Bootstrap returns the authoritative state from a single DB read
+        const res = await fetch('/api/bootstrap');
         const data = await res.json();
 
         // 1. Handle Completion / Lock
-        if (data.completed) {
+        if (data.phase2_completed) {
             lockPhase();
             return;
         }
 
         // 2. Restore State (no timer logic)
-        if (data.state) {
+        const state = data.phase2_state;
+        if (state) {
             restoreStates(
-                data.state.bst_state,
-                data.state.rb_state,
-                data.state.detective_state,
-                data.state.traversal_state
+                state.bst_state,
+                state.rb_state,
+                state.detective_state,
+                state.traversal_state
             );
 
             // Restore Scores
-            const scores = data.state;
+            const scores = state;
             const total = (scores.bst_score || 0) + (scores.rb_score || 0) + (scores.detective_score || 0) + (scores.traversal_score || 0);
             updateScoreDisplay(total);
         }
@@ -66,12 +63,19 @@ function lockPhase() {
 
 // --- STATE MANAGEMENT ---
 
-function requestAutoSave() {
-    // Save immediately without debouncing
-    saveState();
+// Autosave is debounced: a burst of drags produces a single sync call
+const AUTOSAVE_DEBOUNCE_MS = 1000;
+let autoSaveTimer = null;
+
+function requestAutoSave(delay = AUTOSAVE_DEBOUNCE_MS) {
+    clearTimeout(autoSaveTimer);
+    autoSaveTimer = setTimeout(saveState, delay);
 }
 
 async function saveState() {
+    // An explicit save supersedes any pending debounced one
+    clearTimeout(autoSaveTimer);
+
     // Capture state from DOM
     const bstState = captureBoardState('bst');
     const rbState = captureBoardState('rb');
@@ -97,6 +101,13 @@ async function saveState() {
             body: JSON.stringify(payload)
         });
 
+        // Server is shedding load - retry once it says it has room
+        if (res.status === 429 || res.status === 503) {
+            const retryAfter = parseInt(res.headers.get('Retry-After')) || 2;
+            requestAutoSave(retryAfter * 1000);
+            return;
+        }
+
         const d = await res.json();
         if (d.completed) {
             lockPhase();
@@ -336,12 +347,27 @@ function closeConfirm() {
     document.getElementById('confirm-modal').classList.remove('active');
 }
 
+// One key per exit attempt - double clicks and retries reuse it
+let exitIdempotencyKey = null;
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
 async function confirmExit() {
     await saveState(); // Final State Save
 
+    if (!exitIdempotencyKey) {
+        exitIdempotencyKey = newIdempotencyKey();
+    }
+
     // CRITICAL: Get phase completion status from API response (DB-driven)
     try {
-        const res = await fetch('/api/phase2/exit', { method: 'POST' });
+        const res = await fetch('/api/phase2/exit', {
+            method: 'POST',
+            headers: { 'Idempotency-Key': exitIdempotencyKey }
+        });
         const data = await res.json();
 
         if (data.success) {
@@ -21,13 +21,7 @@ document.addEventListener('DOMContentLoaded', () => {
             localStorage.setItem('codeverse_user', JSON.stringify(userData));
 
             // Send to backend to create session and database entry
-            fetch('/api/login', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify(userData)
-            })
+            postLogin(userData)
                 .then(response => response.json())
                 .then(data => {
                     if (data.success) {
@@ -61,3 +55,34 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 });
+
+// Retry login when the server sheds load (429/503). Retry-After estimates how
+// long the server needs to drain everyone ahead; the wait also backs off
+// exponentially and is spread over 0.5x-1.5x so a room full of participants
+// does not retry in lockstep. Gives up only after LOGIN_RETRY_BUDGET_MS.
+const LOGIN_RETRY_BUDGET_MS = 5 * 60 * 1000;
+const LOGIN_MAX_BACKOFF_SECONDS = 30;
+
+async function postLogin(userData, attempt = 0, startedAt = Date.now()) {
+    const response = await fetch('/api/login', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(userData)
+    });
+
+    if (response.status === 429 || response.status === 503) {
+        const retryAfter = parseInt(response.headers.get('Retry-After')) || 2;
+        const backoff = Math.min(LOGIN_MAX_BACKOFF_SECONDS, 2 ** attempt);
+        const delay = Math.max(retryAfter, backoff) * 1000 * (0.5 + Math.random());
+        if (Date.now() - startedAt + delay < LOGIN_RETRY_BUDGET_MS) {
+            // Long waits are expected in a login storm - show that we're still trying
+            const btn = document.querySelector('#login-form button[type="submit"]');
+            if (btn) btn.innerHTML = "HIGH TRAFFIC - RETRYING...";
+            await new Promise(resolve => setTimeout(resolve, delay));
+            return postLogin(userData, attempt + 1, startedAt);
+        }
+    }
+    return response;
+}
@@ -1,6 +1,7 @@
 async function checkPhaseStatus() {
     try {
-        const response = await fetch('/api/status');
+        // One round trip: flags + scores (visibility rule applied server-side)
+        const response = await fetch('/api/bootstrap');
         const status = await response.json();
         return status;
     } catch (error) {
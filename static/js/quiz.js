@@ -36,29 +36,16 @@ document.addEventListener('DOMContentLoaded', () => {
     console.log('DOM Content Loaded - Quiz.js initialized');
     console.log('Window location:', window.location.href);
 
-    // Test if API is accessible first
-    fetch('/api/test')
-        .then(res => res.json())
-        .then(data => {
-            console.log('API test successful:', data);
-            fetchQuestions();
-        })
-        .catch(err => {
-            console.warn('API test failed, using fallback questions:', err);
-            console.log('Using fallback questions');
-            questions = FALLBACK_QUESTIONS;
-            renderQuestion();
-            updateProgress();
-        });
+    fetchQuestions();
 });
 
 async function fetchQuestions() {
     try {
-        console.log('Fetching questions from /api/quiz...');
+        console.log('Fetching questions from /api/bootstrap...');
         console.log('Current URL:', window.location.href);
 
-        // Try to fetch questions
-        const res = await fetch('/api/quiz', {
+        // Session state and questions arrive in a single round trip
+        const res = await fetch('/api/bootstrap?include=quiz', {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json',
@@ -75,7 +62,8 @@ async function fetchQuestions() {
             throw new Error(`HTTP error! status: ${res.status}, body: ${errorText}`);
         }
 
-        const data = await res.json();
+        const payload = await res.json();
+        const data = payload ? payload.quiz : null;
         console.log('Received data:', data);
         console.log('Data type:', typeof data);
         console.log('Is array?', Array.isArray(data));
@@ -102,6 +90,15 @@ async function fetchQuestions() {
         updateProgress();
 
     } catch (e) {
+        // Server unreachable (fetch itself failed) - use the fallback questions
+        if (e instanceof TypeError && questions.length === 0) {
+            console.warn('API unreachable, using fallback questions:', e);
+            questions = FALLBACK_QUESTIONS;
+            renderQuestion();
+            updateProgress();
+            return;
+        }
+
         console.error("Failed to load quiz", e);
         console.error("Error stack:", e.stack);
 
@@ -265,16 +262,31 @@ function updateProgress() {
     }
 }
 
+// One key per quiz attempt - double clicks and retries reuse it
+let submitIdempotencyKey = null;
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
 async function submitQuiz() {
     const overlay = document.getElementById('loading-overlay');
     if (overlay) {
         overlay.classList.add('active');
     }
 
+    if (!submitIdempotencyKey) {
+        submitIdempotencyKey = newIdempotencyKey();
+    }
+
     try {
         const res = await fetch('/api/submit-quiz', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
+            headers: {
+                'Content-Type': 'application/json',
+                'Idempotency-Key': submitIdempotencyKey
+            },
             body: JSON.stringify({ 
                 answers: userAnswers,
                 questionsAttempted: Object.keys(userAnswers).length,